@@ -0,0 +1,58 @@
+# ======================================================================
+# Precomputed affinity kernel of document atoms: cosine similarities
+# [S, S]. Dense, or (opt-in) sparse top-k neighbour graph for large
+# documents, which trades retrieval results for memory.
+# Query independent: built once at ingest and persisted.
+# ======================================================================
+
+import numpy as np
+import torch as T
+
+
+_BLOCK = 1024  # Rows per similarity block when building neighbour graph
+
+
+# Unit-length rows (near-zero rows kept as is)
+# ----------------------------------------------------------------------
+def _to_phase(vectors):
+	V     = T.tensor(np.asarray(vectors, dtype=np.float32))
+	norms = T.linalg.norm(V, dim=1, keepdim=True)
+	return V / T.where(norms > 1e-6, norms, T.ones_like(norms))
+
+# Dense kernel [S, S]
+# ----------------------------------------------------------------------
+def build_dense(vectors):
+	V = _to_phase(vectors)
+	return V @ V.T
+
+# Sparse kernel [S, S]: per row only its top-k neighbours (self included),
+# built block by block so memory stays O(S × block)
+# ----------------------------------------------------------------------
+def build_sparse(vectors, neighbours):
+	V       = _to_phase(vectors)
+	S       = len(V)
+	k       = min(neighbours, S)
+	rows    = []
+	cols    = []
+	values  = []
+
+	for start in range(0, S, _BLOCK):
+		scores, idx = T.topk(V[start:start + _BLOCK] @ V.T, k, dim=1)
+		rows.append(T.arange(start, start + len(idx)).repeat_interleave(k))
+		cols.append(idx.reshape(-1))
+		values.append(scores.reshape(-1))
+
+	return T.sparse_coo_tensor(
+		T.stack([T.cat(rows), T.cat(cols)]),
+		T.cat(values),
+		(S, S),
+		check_invariants = False
+	).coalesce()
+
+# Kernel for document vectors: dense, or sparse above dense_max atoms
+# when neighbours are given (0 → always dense)
+# ----------------------------------------------------------------------
+def build_affinity(vectors, dense_max=1024, neighbours=0):
+	if not neighbours or len(vectors) <= dense_max:
+		return build_dense(vectors)
+	return build_sparse(vectors, neighbours)
@@ -0,0 +1,178 @@
+# ======================================================================
+# In-memory atom store: per document one contiguous float32 vector
+# matrix with atom texts and ids, so search runs without DB access or
+# blob decoding. Derived per-document kernels (S × S) live in a
+# byte-capped LRU cache next to it.
+# ======================================================================
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from wordwield.core.sid import Sid
+
+
+class DocumentAtoms:
+	def __init__(self, domain_id, id, key, ids, texts, vectors):
+		self.domain_id = domain_id
+		self.id        = id        # Document id (part of Sid)
+		self.key       = key       # Document key (path / url / slug)
+		self.ids       = ids       # Atom Sids, int64 (n,)
+		self.texts     = texts     # Atom texts, n
+		self.vectors   = vectors   # Atom vectors, contiguous float32 (n, dim)
+		self.norms     = np.linalg.norm(vectors, axis=1)  # Row norms (n,), computed once for query cosines
+
+	def __len__(self):
+		return len(self.ids)
+
+	# Row of atom sid, or None (ids ascending)
+	# ----------------------------------------------------------------------
+	def get_row(self, sid):
+		row = int(np.searchsorted(self.ids, sid))
+		return row if row < len(self.ids) and self.ids[row] == sid else None
+
+
+# Approximate memory of kernel: tensors by their storage, opaque kernels
+# (e.g. yo.kernels.Affinity) as dense float32 S × S
+# ----------------------------------------------------------------------
+def kernel_nbytes(kernel, size):
+	if hasattr(kernel, 'is_sparse') and kernel.is_sparse:
+		return kernel._nnz() * (kernel.values().element_size() + 2 * 8)
+	if hasattr(kernel, 'element_size'):
+		return kernel.numel() * kernel.element_size()
+	if hasattr(kernel, 'nbytes'):
+		return kernel.nbytes
+	return size * size * 4
+
+
+class KernelCache:
+	def __init__(self, max_bytes):
+		self.max_bytes = max_bytes          # Budget; least recently used kernels evicted beyond it
+		self.items     = OrderedDict()      # (domain_id, document_id, name) → (kernel, nbytes)
+		self.nbytes    = 0                  # Bytes held
+		self.lock      = threading.Lock()   # Search threads share the cache
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Get kernel or None, marking it recently used
+	# ----------------------------------------------------------------------
+	def get(self, domain_id, document_id, name):
+		key = (domain_id, document_id, name)
+
+		with self.lock:
+			item = self.items.get(key)
+			if item is not None:
+				self.items.move_to_end(key)
+
+		return item[0] if item is not None else None
+
+	# Store kernel of document with `size` atoms, evict beyond budget
+	# (the newest kernel always stays)
+	# ----------------------------------------------------------------------
+	def set(self, domain_id, document_id, name, kernel, size):
+		key    = (domain_id, document_id, name)
+		nbytes = kernel_nbytes(kernel, size)
+
+		with self.lock:
+			if key in self.items:
+				self.nbytes -= self.items.pop(key)[1]
+
+			self.items[key]  = (kernel, nbytes)
+			self.nbytes     += nbytes
+
+			while self.nbytes > self.max_bytes and len(self.items) > 1:
+				self.nbytes -= self.items.popitem(last=False)[1][1]
+
+	# Budget used up: further kernels evict others
+	# ----------------------------------------------------------------------
+	def is_full(self):
+		return self.nbytes >= self.max_bytes
+
+	# Drop kernels of document, or of whole domain
+	# ----------------------------------------------------------------------
+	def unset(self, domain_id, document_id=None):
+		with self.lock:
+			for key in [key for key in self.items if key[0] == domain_id and document_id in (None, key[1])]:
+				self.nbytes -= self.items.pop(key)[1]
+
+
+class AtomStore:
+	def __init__(self, kernel_bytes=512 << 20):
+		self.domains = {}                         # domain_id → {document_id → DocumentAtoms}
+		self.kernels = KernelCache(kernel_bytes)  # (domain_id, document_id, name) → derived kernel
+		self.lock    = threading.Lock()           # Ingestion may update while queries read
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Store document atoms from DB rows (id, text, vector blob), ordered by id
+	# ----------------------------------------------------------------------
+	def set(self, domain_id, document_id, key, rows):
+		rows    = [row for row in rows if row[2] is not None]
+		ids     = np.array([row[0] for row in rows], dtype='int64')
+		texts   = [row[1] for row in rows]
+		vectors = np.frombuffer(b''.join(bytes(row[2]) for row in rows), dtype='float32')
+		vectors = vectors.reshape(len(rows), -1) if rows else vectors.reshape(0, 0)
+
+		return self.set_arrays(domain_id, document_id, key, ids, texts, vectors)
+
+	# Store document atoms from ids, texts and float32 (n, dim) vectors
+	# (e.g. gathered chunk by chunk during streaming ingestion)
+	# ----------------------------------------------------------------------
+	def set_arrays(self, domain_id, document_id, key, ids, texts, vectors):
+		document = DocumentAtoms(domain_id, document_id, key, ids, texts, np.ascontiguousarray(vectors, dtype='float32'))
+
+		with self.lock:
+			self.domains.setdefault(domain_id, {})[document_id] = document
+
+		self.kernels.unset(domain_id, document_id)  # Built from previous atoms
+		return document
+
+	# Store atoms of several documents from DB rows of a Sid range
+	# ----------------------------------------------------------------------
+	def set_many(self, domain_id, keys, rows):
+		'''
+		keys: {document_id: key} of documents to store (documents without
+		atoms are stored empty)
+		rows: (id, text, vector blob) ordered by id
+		'''
+		groups = {document_id: [] for document_id in keys}
+
+		for row in rows:
+			document_id = Sid(row[0]).document_id
+			if document_id in groups:
+				groups[document_id].append(row)
+
+		for document_id, document_rows in groups.items():
+			self.set(domain_id, document_id, keys[document_id], document_rows)
+
+	# Get document atoms or None
+	# ----------------------------------------------------------------------
+	def get(self, domain_id, document_id):
+		return self.domains.get(domain_id, {}).get(document_id)
+
+	# Get all documents of domain (stable list, safe against updates)
+	# ----------------------------------------------------------------------
+	def get_documents(self, domain_id):
+		with self.lock:
+			return list(self.domains.get(domain_id, {}).values())
+
+	# Number of stored atoms in domain
+	# ----------------------------------------------------------------------
+	def get_size(self, domain_id):
+		return sum(len(document) for document in self.get_documents(domain_id))
+
+	# Remove document, or whole domain
+	# ----------------------------------------------------------------------
+	def unset(self, domain_id, document_id=None):
+		with self.lock:
+			if document_id is None:
+				self.domains.pop(domain_id, None)
+			else:
+				self.domains.get(domain_id, {}).pop(document_id, None)
+
+		self.kernels.unset(domain_id, document_id)
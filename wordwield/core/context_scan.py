@@ -0,0 +1,73 @@
+# ======================================================================
+# Karma recurrence scan: ap[i] = to_hypercube(ap_static[i] + karma * ap[i-1]).
+# In-place over one contiguous buffer, same op sequence as Norm.to_hypercube,
+# so results are bit-identical to the per-sentence loop.
+# ======================================================================
+
+import numpy as np
+import torch
+
+from wordwield.core.norm import Norm, epsilon
+
+
+class ContextScan:
+	# ======================================================================
+	# PRIVATE METHODS
+	# ======================================================================
+
+	# In-place scan over float32 CPU buffer [N, D], starting from prev [D]
+	# ----------------------------------------------------------------------
+	@staticmethod
+	def _scan_numpy(buffer, prev, karma):
+		karma = np.float32(karma)
+		eps   = np.float32(epsilon)
+		carry = np.empty(buffer.shape[1], dtype=np.float32)
+
+		for i in range(buffer.shape[0]):
+			row = buffer[i]
+			np.multiply(prev, karma, out=carry)
+			np.add(row, carry, out=row)
+			np.divide(row, np.abs(row).max() + eps, out=row)
+			prev = row
+
+		return buffer
+
+	# Fallback scan for other devices and dtypes
+	# ----------------------------------------------------------------------
+	@staticmethod
+	def _scan_torch(buffer, prev, karma):
+		for i in range(buffer.size(0)):
+			buffer[i] = Norm.to_hypercube(buffer[i] + karma * prev)
+			prev      = buffer[i]
+
+		return buffer
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Apply recurrence over [N, D] static AP values, continuing from ap_prev
+	# ----------------------------------------------------------------------
+	@staticmethod
+	def apply(ap_static, ap_prev=None, karma=1):
+		'''
+		ap_prev:
+			- None → first row is kept as is, recurrence starts from it
+			- [D]  → last AP of previous chunk (continues a long document)
+		'''
+		buffer = ap_static.detach().clone().contiguous()
+		start  = 0
+
+		if ap_prev is None:
+			start = 1
+			prev  = buffer[0] if buffer.size(0) else None
+		else:
+			prev  = ap_prev.detach().to(device=buffer.device, dtype=buffer.dtype)
+
+		if buffer.size(0) > start:
+			if buffer.device.type == 'cpu' and buffer.dtype == torch.float32:
+				ContextScan._scan_numpy(buffer[start:].numpy(), prev.numpy(), karma)
+			else:
+				ContextScan._scan_torch(buffer[start:], prev, karma)
+
+		return buffer
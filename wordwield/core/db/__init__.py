@@ -1,4 +1,7 @@
-from .edge_record       import EdgeRecord
-from .semantic_domain   import SemanticDomain
-from .semantic_document import SemanticDocument
-from .semantic_atom     import SemanticAtom
\ No newline at end of file
+from .edge_record              import EdgeRecord
+from .semantic_domain          import SemanticDomain
+from .semantic_document        import SemanticDocument
+from .semantic_atom            import SemanticAtom
+from .semantic_domain_log      import SemanticDomainLog
+from .semantic_domain_index    import SemanticDomainIndex
+from .semantic_document_kernel import SemanticDocumentKernel
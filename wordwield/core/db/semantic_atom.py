@@ -7,7 +7,7 @@ from datetime import datetime
 import torch
 import numpy as np
 
-from sqlalchemy     import ForeignKey, Column, DateTime, Integer, LargeBinary, Text
+from sqlalchemy     import ForeignKey, Column, DateTime, Integer, LargeBinary, Text, func
 from sqlalchemy.orm import relationship
 
 from wordwield.core.base.record import Record
@@ -92,7 +92,7 @@ class SemanticAtom(Record):
 		result = {}
 
 		if sid is not None:
-			v = sid if isinstance(sid, Sid) else Sid(id=sid)
+			v = sid if isinstance(sid, Sid) else Sid(sid)
 			query = query.filter(cls.id == v.id)
 
 		for row in query.all():
@@ -103,6 +103,31 @@ class SemanticAtom(Record):
 
 		return result
 
+	# Count atoms in domain (Sid range scan on primary key)
+	# ----------------------------------------------------------------------
+	@classmethod
+	def count(cls, domain_id: int) -> int:
+		id_min, id_max = Sid.get_domain_id_range(domain_id)
+		return cls.session.query(func.count(cls.id)).filter(cls.id.between(id_min, id_max)).scalar()
+
+	# Rows (id, text, vector blob) in Sid range, ordered by id
+	# ----------------------------------------------------------------------
+	@classmethod
+	def get_range(cls, id_min: int, id_max: int):
+		return (
+			cls.session
+				.query(cls.id, cls.text, cls.vector)
+				.filter(cls.id.between(id_min, id_max))
+				.order_by(cls.id)
+				.all()
+		)
+
+	# Remove all atoms in Sid range (DB foreign key cascades are not enforced)
+	# ----------------------------------------------------------------------
+	@classmethod
+	def unset_range(cls, id_min: int, id_max: int):
+		cls.session.query(cls).filter(cls.id.between(id_min, id_max)).delete(synchronize_session=False)
+
 	# Remove atom by semantic id
 	# ----------------------------------------------------------------------
 	@classmethod
@@ -110,7 +135,7 @@ class SemanticAtom(Record):
 		removed = False
 
 		if sid is not None:
-			v = sid if isinstance(sid, Sid) else Sid(id=sid)
+			v = sid if isinstance(sid, Sid) else Sid(sid)
 
 			rows = (
 				cls.session
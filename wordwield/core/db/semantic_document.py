@@ -5,6 +5,7 @@
 import time
 
 from sqlalchemy import (
+	func,
 	ForeignKey,
 	Column,
 	DateTime,
@@ -14,16 +15,20 @@ from sqlalchemy import (
 	UniqueConstraint,
 	Boolean
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, aliased
 
-from wordwield.core.base.record import Record
-from wordwield.core.sid         import Sid
-from wordwield.core.db.semantic_atom import SemanticAtom
+from wordwield.core.base.record                 import Record
+from wordwield.core.sid                         import Sid
+from wordwield.core.db.semantic_atom            import SemanticAtom
+from wordwield.core.db.semantic_document_kernel import SemanticDocumentKernel
 
 
 class SemanticDocument(Record):
 	__tablename__ = 'semantic_document'
 
+	MAX_ATOMS     = 0x10000  # Atom item ids are 16-bit (part of Sid)
+	MAX_DOCUMENTS = 0x10000  # Document ids are 16-bit and unique across domains: cap on live documents of installation
+
 	# Foreign
 	domain_id = Column(
 		Integer,
@@ -72,6 +77,39 @@ class SemanticDocument(Record):
 	def __repr__(self):
 		return f'<SemanticDocument id={self.id} domain_id={self.domain_id} key={self.key} >'
 
+	# ======================================================================
+	# PRIVATE METHODS
+	# ======================================================================
+
+	# Next document id: after highest one, or once 16-bit id space is used
+	# up, lowest id freed by removed documents (of any domain)
+	# ----------------------------------------------------------------------
+	@classmethod
+	def _get_free_id(cls) -> int:
+		last = cls.session.query(func.max(cls.id)).scalar()
+
+		if last is None:
+			return 0
+		if last + 1 < cls.MAX_DOCUMENTS:
+			return int(last) + 1
+		if cls.session.query(cls.id).filter_by(id=0).first() is None:
+			return 0
+
+		following = aliased(cls)
+		gap       = (
+			cls.session
+				.query(cls.id)
+				.outerjoin(following, following.id == cls.id + 1)
+				.filter(following.id.is_(None), cls.id + 1 < cls.MAX_DOCUMENTS)
+				.order_by(cls.id)
+				.first()
+		)
+
+		if gap is None:
+			raise ValueError(f'No free document id: {cls.MAX_DOCUMENTS} documents exist across all domains')
+
+		return int(gap[0]) + 1
+
 	# ======================================================================
 	# PUBLIC METHODS
 	# ======================================================================
@@ -116,15 +154,9 @@ class SemanticDocument(Record):
 	) -> int:
 		row = cls.get_by_key(domain_id, key)
 
+		# Ids are unique across domains: primary key and atom foreign key are id only
 		if id is None or row is not None:
-			last = (
-				cls.session
-					.query(cls.id)
-					.filter_by(domain_id=domain_id)
-					.order_by(cls.id.desc())
-					.first()
-			)
-			id = int(last[0]) + 1 if last else 0
+			id = cls._get_free_id()
 
 		if id < 0 or id > 0xFFFF:
 			raise ValueError('Document id must fit in 16 bits')
@@ -154,6 +186,9 @@ class SemanticDocument(Record):
 		row = cls.get(domain_id, document_id)
 
 		if row is not None:
+			SemanticAtom.unset_range(*Sid.get_document_id_range(row.id, domain_id))
+			SemanticDocumentKernel.unset(domain_id, row.id)
+			cls.session.expire(row, ['atoms'])  # Atoms already deleted: keep ORM cascade from deleting loaded ones again
 			cls.session.delete(row)
 			cls.session.flush()
 			ok = True
@@ -166,25 +201,62 @@ class SemanticDocument(Record):
 	# ATOM MANAGEMENT
 	# ======================================================================
 
-	# Add one atom to this document
+	# Add atoms to this document, item ids starting at offset
 	# ----------------------------------------------------------------------
-	def set_atoms(self, texts, vectors):
+	def set_atoms(self, texts, vectors, offset=0):
 		vector_ids = []
 
-		for item_id in range(len(texts)):
+		if offset + len(texts) > self.MAX_ATOMS:
+			raise ValueError('Document atom ids must fit in 16 bits')
+
+		for n in range(len(texts)):
 			atom_id = Sid(
 				domain_id   = self.domain_id,
 				document_id = self.id,
-				item_id     = item_id
+				item_id     = offset + n
 			).id
 
 			SemanticAtom.set(
 				sid    = atom_id,
-				text   = texts[item_id],
-				vector = vectors[item_id],
+				text   = texts[n],
+				vector = vectors[n],
 			)
 
 			vector_ids.append(atom_id)
 
 		SemanticAtom.session.flush()
 		return vector_ids
+
+	# ======================================================================
+	# TEST METHODS
+	# ======================================================================
+
+	# Test id reuse at 16-bit cap: with highest id taken, new documents get
+	# lowest free id, and an id freed by removal is handed out again.
+	# Runs in savepoint, rolled back
+	# ----------------------------------------------------------------------
+	@classmethod
+	def test_ids(cls, domain_id: int):
+		savepoint = cls.session.begin_nested()
+
+		try:
+			top = cls.MAX_DOCUMENTS - 1
+			if cls.session.query(cls.id).filter_by(id=top).first() is None:
+				cls.set(domain_id, '__test_top__', mtime=0, id=top)
+
+			used     = {int(id) for (id,) in cls.session.query(cls.id)}
+			expected = min(set(range(cls.MAX_DOCUMENTS)) - used)
+			first    = cls.set(domain_id, '__test_first__',  mtime=0)
+			second   = cls.set(domain_id, '__test_second__', mtime=0)
+			cls.unset(domain_id, first)
+			reused   = cls.set(domain_id, '__test_reused__', mtime=0)
+		finally:
+			savepoint.rollback()
+
+		print(f'\n=== Document ids at cap: expected {expected}, got {first}, {second}, reused {reused} ===')
+
+		if (first, reused) != (expected, expected) or second in used or second == first:
+			raise AssertionError(f'Document id reuse failed: first={first} second={second} reused={reused} expected={expected}')
+
+		print('✓ freed document ids are reused')
+		return first, second
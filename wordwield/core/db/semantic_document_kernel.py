@@ -0,0 +1,139 @@
+# ======================================================================
+# Precomputed per-document kernels (affinity), stored next to the atoms
+# so search loads them instead of rebuilding.
+# ======================================================================
+
+import io
+
+import torch
+import numpy as np
+
+from sqlalchemy import (
+	Column,
+	Integer,
+	LargeBinary,
+	Text,
+	Index
+)
+
+from wordwield.core.base.record import Record
+
+
+# ======================================================================
+# PRIVATE METHODS
+# ======================================================================
+
+# Serialize dense or sparse kernel tensor to binary blob
+# ----------------------------------------------------------------------
+def kernel_serialize(kernel):
+	buffer = io.BytesIO()
+
+	if kernel.is_sparse:
+		kernel = kernel.coalesce()
+		np.savez(
+			buffer,
+			shape   = np.asarray(kernel.shape),
+			indices = kernel.indices().numpy().astype(np.int32),
+			values  = kernel.values().numpy().astype(np.float32)
+		)
+	else:
+		np.savez(buffer, dense=kernel.detach().cpu().numpy().astype(np.float32))
+
+	return buffer.getvalue()
+
+# Deserialize kernel tensor from binary blob
+# ----------------------------------------------------------------------
+def kernel_deserialize(blob):
+	data = np.load(io.BytesIO(bytes(blob)))
+
+	if 'dense' in data:
+		return torch.from_numpy(data['dense'])
+
+	return torch.sparse_coo_tensor(
+		torch.from_numpy(data['indices'].astype(np.int64)),
+		torch.from_numpy(data['values']),
+		tuple(data['shape'].tolist()),
+		check_invariants = True  # Blob read from DB: validate before use
+	).coalesce()
+
+
+# ======================================================================
+# MODEL
+# ======================================================================
+
+class SemanticDocumentKernel(Record):
+	__tablename__ = 'semantic_document_kernel'
+
+	document_id = Column(Integer,     primary_key=True)  # Document id (unique across domains)
+	name        = Column(Text,        primary_key=True)  # Kernel name, e.g. 'affinity'
+	domain_id   = Column(Integer,     nullable=False)
+	size        = Column(Integer,     nullable=False)    # Atoms covered: stale when document changed
+	blob        = Column(LargeBinary, nullable=False)
+
+	# Constraints
+	# ----------------------------------------------------------------------
+	__table_args__ = (
+		Index('ix_semantic_document_kernel_domain', 'domain_id'),
+	)
+
+	def __repr__(self):
+		return f'<SemanticDocumentKernel document_id={self.document_id} name={self.name} size={self.size}>'
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Get named kernel of document as tensor, or None
+	# ----------------------------------------------------------------------
+	@classmethod
+	def get(cls, domain_id: int, document_id: int, name: str):
+		row = cls.session.query(cls).filter_by(domain_id=domain_id, document_id=document_id, name=name).first()
+		return kernel_deserialize(row.blob) if row is not None else None
+
+	# Atom counts of stored named kernels as {document_id: size}, without
+	# loading blobs (all documents of domain when document_ids is None)
+	# ----------------------------------------------------------------------
+	@classmethod
+	def get_sizes(cls, domain_id: int, name: str, document_ids=None) -> dict:
+		query = cls.session.query(cls.document_id, cls.size).filter_by(domain_id=domain_id, name=name)
+
+		if document_ids is not None:
+			query = query.filter(cls.document_id.in_(list(document_ids)))
+
+		return dict(query.all())
+
+	# Get named kernels of domain documents (all when document_ids is None)
+	# as {document_id: tensor}
+	# ----------------------------------------------------------------------
+	@classmethod
+	def get_many(cls, domain_id: int, name: str, document_ids=None) -> dict:
+		query = cls.session.query(cls).filter_by(domain_id=domain_id, name=name)
+
+		if document_ids is not None:
+			query = query.filter(cls.document_id.in_(list(document_ids)))
+
+		return {row.document_id: kernel_deserialize(row.blob) for row in query.all()}
+
+	# Create or replace named kernel of document
+	# ----------------------------------------------------------------------
+	@classmethod
+	def set(cls, domain_id: int, document_id: int, name: str, kernel):
+		cls.session.merge(cls(
+			document_id = document_id,
+			name        = name,
+			domain_id   = domain_id,
+			size        = kernel.shape[0],
+			blob        = kernel_serialize(kernel)
+		))
+		cls.session.flush()
+
+	# Remove kernels of document, or of whole domain
+	# ----------------------------------------------------------------------
+	@classmethod
+	def unset(cls, domain_id: int, document_id: int | None = None):
+		query = cls.session.query(cls).filter_by(domain_id=domain_id)
+
+		if document_id is not None:
+			query = query.filter_by(document_id=document_id)
+
+		query.delete(synchronize_session=False)
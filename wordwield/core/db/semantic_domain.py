@@ -14,8 +14,11 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import relationship
 
-from wordwield.core.base.record          import Record
-from wordwield.core.db.semantic_document import SemanticDocument
+from wordwield.core.base.record                 import Record
+from wordwield.core.sid                         import Sid
+from wordwield.core.db.semantic_document        import SemanticDocument
+from wordwield.core.db.semantic_atom            import SemanticAtom
+from wordwield.core.db.semantic_document_kernel import SemanticDocumentKernel
 
 
 class SemanticDomain(Record):
@@ -114,6 +117,10 @@ class SemanticDomain(Record):
 		row = cls.get(domain_id)
 
 		if row is not None:
+			SemanticAtom.unset_range(*Sid.get_domain_id_range(row.id))
+			SemanticDocumentKernel.unset(row.id)
+			cls.session.query(SemanticDocument).filter_by(domain_id=row.id).delete(synchronize_session=False)
+			cls.session.expire(row, ['documents'])  # Documents already deleted: keep ORM cascade from deleting loaded ones again
 			cls.session.delete(row)
 			cls.session.flush()
 			return True
@@ -0,0 +1,47 @@
+# ======================================================================
+# Vector index configuration of a domain (kind, promotion, ANN params).
+# ======================================================================
+
+import json
+
+from sqlalchemy import (
+	Column,
+	Integer,
+	Text
+)
+
+from wordwield.core.base.record import Record
+
+
+class SemanticDomainIndex(Record):
+	__tablename__ = 'semantic_domain_index'
+
+	domain_id = Column(Integer, primary_key=True)
+	config    = Column(Text,    nullable=False)  # json: Vdb index config overrides
+
+	def __repr__(self):
+		return f'<SemanticDomainIndex domain_id={self.domain_id} config={self.config}>'
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Get index config overrides of domain (None → Vdb defaults)
+	# ----------------------------------------------------------------------
+	@classmethod
+	def get(cls, domain_id: int) -> dict | None:
+		row = cls.session.query(cls).filter_by(domain_id=domain_id).first()
+		return json.loads(row.config) if row is not None else None
+
+	# Create or replace index config of domain
+	# ----------------------------------------------------------------------
+	@classmethod
+	def set(cls, domain_id: int, config: dict):
+		cls.session.merge(cls(domain_id=domain_id, config=json.dumps(config)))
+		cls.session.flush()
+
+	# Remove index config of domain
+	# ----------------------------------------------------------------------
+	@classmethod
+	def unset(cls, domain_id: int):
+		cls.session.query(cls).filter_by(domain_id=domain_id).delete(synchronize_session=False)
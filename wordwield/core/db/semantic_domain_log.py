@@ -0,0 +1,106 @@
+# ======================================================================
+# Domain change log: document add/remove operations for vector snapshot
+# replay. Latest entry id is the domain version.
+# ======================================================================
+
+import time
+
+from sqlalchemy import (
+	Column,
+	Integer,
+	Text,
+	Index,
+	func
+)
+
+from wordwield.core.base.record import Record
+
+
+class SemanticDomainLog(Record):
+	__tablename__ = 'semantic_domain_log'
+
+	id          = Column(Integer, primary_key=True, autoincrement=True)  # Monotonic version
+	domain_id   = Column(Integer, nullable=False)
+	document_id = Column(Integer, nullable=False)
+	op          = Column(Text,    nullable=False)                        # 'add' | 'remove'
+	created     = Column(Integer, nullable=False)
+
+	# Constraints
+	# ----------------------------------------------------------------------
+	__table_args__ = (
+		Index('ix_semantic_domain_log_domain', 'domain_id', 'id'),
+		{'sqlite_autoincrement': True},  # Never reuse ids: versions stay monotonic
+	)
+
+	def __repr__(self):
+		return f'<SemanticDomainLog id={self.id} domain_id={self.domain_id} document_id={self.document_id} op={self.op}>'
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Log document operation, return new domain version
+	# ----------------------------------------------------------------------
+	@classmethod
+	def add(cls, domain_id: int, document_id: int, op: str) -> int:
+		if op not in ('add', 'remove'):
+			raise ValueError(f'Unknown domain log op `{op}`')
+
+		row = cls(
+			domain_id   = domain_id,
+			document_id = document_id,
+			op          = op,
+			created     = int(time.time())
+		)
+
+		cls.session.add(row)
+		cls.session.flush()
+
+		return int(row.id)
+
+	# Current domain version (0 → nothing logged)
+	# ----------------------------------------------------------------------
+	@classmethod
+	def get_version(cls, domain_id: int) -> int:
+		version = cls.session.query(func.max(cls.id)).filter_by(domain_id=domain_id).scalar()
+		return int(version or 0)
+
+	# Operations logged after given version, oldest first
+	# ----------------------------------------------------------------------
+	@classmethod
+	def get_since(cls, domain_id: int, version: int):
+		return (
+			cls.session
+				.query(cls)
+				.filter(cls.domain_id == domain_id, cls.id > version)
+				.order_by(cls.id)
+				.all()
+		)
+
+	# Number of operations logged after given version
+	# ----------------------------------------------------------------------
+	@classmethod
+	def count_since(cls, domain_id: int, version: int) -> int:
+		return (
+			cls.session
+				.query(func.count(cls.id))
+				.filter(cls.domain_id == domain_id, cls.id > version)
+				.scalar()
+		)
+
+	# Drop operations covered by snapshot (latest entry kept as version)
+	# ----------------------------------------------------------------------
+	@classmethod
+	def unset_before(cls, domain_id: int, version: int):
+		(
+			cls.session
+				.query(cls)
+				.filter(cls.domain_id == domain_id, cls.id < version)
+				.delete(synchronize_session=False)
+		)
+
+	# Drop all operations of domain
+	# ----------------------------------------------------------------------
+	@classmethod
+	def unset(cls, domain_id: int):
+		cls.session.query(cls).filter_by(domain_id=domain_id).delete(synchronize_session=False)
@@ -0,0 +1,163 @@
+# ======================================================================
+# Content-addressed embedding cache: in-memory LRU over on-disk SQLite.
+# ======================================================================
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+from wordwield.core.db.semantic_atom import vector_serialize, vector_deserialize
+
+
+class EmbeddingCache:
+	def __init__(self, path=None, max_memory_items=50_000, max_disk_items=1_000_000):
+		self.path             = path              # SQLite file, None → memory tier only
+		self.max_memory_items = max_memory_items  # LRU bound of memory tier
+		self.max_disk_items   = max_disk_items    # LRU bound of disk tier
+		self.memory           = OrderedDict()     # key → float32 cpu tensor, oldest first
+		self.lock             = threading.Lock()
+		self.db               = None
+		self.disk_items       = 0
+		self.hits             = 0
+		self.misses           = 0
+
+		if path is not None:
+			os.makedirs(os.path.dirname(path), exist_ok=True)
+			self.db = sqlite3.connect(path, check_same_thread=False)
+			self.db.execute('CREATE TABLE IF NOT EXISTS embedding (key TEXT PRIMARY KEY, vector BLOB NOT NULL, used INTEGER NOT NULL)')
+			self.db.execute('CREATE INDEX IF NOT EXISTS ix_embedding_used ON embedding (used)')
+			self.db.commit()
+			self.disk_items = self.db.execute('SELECT COUNT(*) FROM embedding').fetchone()[0]
+
+	# ======================================================================
+	# PRIVATE METHODS
+	# ======================================================================
+
+	# Put vector into memory tier, evicting least recently used
+	# ----------------------------------------------------------------------
+	def _set_memory(self, key, vector):
+		self.memory[key] = vector
+		self.memory.move_to_end(key)
+
+		while len(self.memory) > self.max_memory_items:
+			self.memory.popitem(last=False)
+
+	# Read vectors for keys from disk tier and mark them used
+	# ----------------------------------------------------------------------
+	def _get_disk(self, keys):
+		result = {}
+
+		if self.db is not None and keys:
+			now = time.time_ns()
+			for n in range(0, len(keys), 500):  # SQLite variable limit
+				chunk = keys[n:n + 500]
+				marks = ', '.join('?' * len(chunk))
+				rows  = self.db.execute(f'SELECT key, vector FROM embedding WHERE key IN ({marks})', chunk)
+				for key, blob in rows:
+					result[key] = vector_deserialize(bytearray(blob))
+
+			if result:
+				self.db.executemany('UPDATE embedding SET used = ? WHERE key = ?', [(now, key) for key in result])
+				self.db.commit()
+
+		return result
+
+	# Write vectors to disk tier, evicting least recently used
+	# ----------------------------------------------------------------------
+	def _set_disk(self, items):
+		if self.db is not None and items:
+			now  = time.time_ns()
+			rows = [(key, vector_serialize(vector), now) for key, vector in items.items()]
+
+			before = self.db.total_changes
+			self.db.executemany('INSERT OR IGNORE INTO embedding (key, vector, used) VALUES (?, ?, ?)', rows)
+			self.disk_items += self.db.total_changes - before
+
+			if self.disk_items > self.max_disk_items:
+				excess = self.disk_items - self.max_disk_items
+				self.db.execute(
+					'DELETE FROM embedding WHERE key IN (SELECT key FROM embedding ORDER BY used LIMIT ?)',
+					(excess,)
+				)
+				self.disk_items -= excess
+
+			self.db.commit()
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Build cache key from model name, pooling mode and text hash
+	# ----------------------------------------------------------------------
+	@staticmethod
+	def get_key(model_name, mode, text):
+		digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+		return f'{model_name}|{mode}|{digest}'
+
+	# Get cached vectors for keys (missing keys are absent from result)
+	# ----------------------------------------------------------------------
+	def get_many(self, keys):
+		result = {}
+
+		with self.lock:
+			for key in keys:
+				if key in self.memory:
+					self.memory.move_to_end(key)
+					result[key] = self.memory[key]
+
+			from_disk = self._get_disk([key for key in keys if key not in result])
+			for key, vector in from_disk.items():
+				self._set_memory(key, vector)
+				result[key] = vector
+
+			self.hits   += len(result)
+			self.misses += len(keys) - len(result)
+
+		return result
+
+	# Store copies of vectors by key in both tiers (callers keep theirs)
+	# ----------------------------------------------------------------------
+	def set_many(self, items):
+		items = {key: vector.detach().float().cpu().clone() for key, vector in items.items()}
+
+		with self.lock:
+			for key, vector in items.items():
+				self._set_memory(key, vector)
+			self._set_disk(items)
+
+	# Get single cached vector or None
+	# ----------------------------------------------------------------------
+	def get(self, key):
+		return self.get_many([key]).get(key)
+
+	# Store single vector
+	# ----------------------------------------------------------------------
+	def set(self, key, vector):
+		self.set_many({key: vector})
+
+	# Hit/miss counters and tier sizes
+	# ----------------------------------------------------------------------
+	def get_stats(self):
+		lookups = self.hits + self.misses
+		return {
+			'hits'         : self.hits,
+			'misses'       : self.misses,
+			'hit_rate'     : self.hits / lookups if lookups else 0.0,
+			'memory_items' : len(self.memory),
+			'disk_items'   : self.disk_items
+		}
+
+	# Drop all cached vectors and reset counters
+	# ----------------------------------------------------------------------
+	def clear(self):
+		with self.lock:
+			self.memory.clear()
+			if self.db is not None:
+				self.db.execute('DELETE FROM embedding')
+				self.db.commit()
+			self.disk_items = 0
+			self.hits       = 0
+			self.misses     = 0
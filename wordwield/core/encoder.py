@@ -1,35 +1,65 @@
 # ======================================================================
 # Text encoder with attention-based pooling utilities.
-# TODO: add token-level sentence wrapping so we avoid silent tokenizer truncation when texts exceed max_length.
 # TODO: add pooling choice: pooling='attention|mean|cls'
 # ======================================================================
 
 import os
+import math
+import asyncio
 import torch
 import torch.nn.functional as F
 import contextlib
-from transformers import AutoModel, AutoTokenizer
+from concurrent.futures import ThreadPoolExecutor
+from transformers       import AutoTokenizer
 
-from wordwield.core.device import device
-from wordwield.core.norm   import Norm
+from wordwield.core.norm             import Norm
+from wordwield.core.context_scan     import ContextScan
+from wordwield.core.embedding_cache  import EmbeddingCache
+from wordwield.core.encoder_backends import TorchBackend, OnnxBackend
+from wordwield.core.encoder_batcher  import EncoderBatcher
 
 
 class Encoder:
 	
-	def __init__(self, model_name=None):
+	def __init__(
+		self,
+		model_name       = None,
+		max_batch_tokens = None,
+		cache            = None,
+		window_overlap   = 32,
+		backend          = 'torch',
+		backend_dir      = None,
+		async_batch_size = 32,
+		async_wait_ms    = 5
+	):
 		default_model_name = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
 		self.model_name    = model_name or default_model_name
 
-		self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-		self.model     = AutoModel.from_pretrained(self.model_name, attn_implementation = 'eager').to(device)
-		self.dim       = self.model.config.hidden_size
-
-		self.model.eval()
+		self.tokenizer        = AutoTokenizer.from_pretrained(self.model_name)
+		self.backend_dir      = backend_dir
+		self.backend          = self._get_backend(backend, backend_dir)  # 'torch' | 'onnx' | 'onnx-int8'
+		self.dim              = self.backend.dim
+		self.max_batch_tokens = max_batch_tokens                   # Padded tokens per forward pass, None → one batch
+		self.prefetcher       = ThreadPoolExecutor(max_workers=1)  # Collates next bucket during forward pass
+		self.cache            = cache                              # EmbeddingCache or None
+		self.window_overlap   = window_overlap                     # Tokens shared by neighbouring windows of long texts
+		self.async_batch_size = async_batch_size                   # Max concurrent encode_async requests per forward pass
+		self.async_wait_ms    = async_wait_ms                      # Max wait for more encode_async requests
+		self.batcher          = None                               # EncoderBatcher bound to current event loop
 
 	# ======================================================================
 	# PRIVATE METHODS
 	# ======================================================================
 
+	# Create model backend by name
+	# ----------------------------------------------------------------------
+	def _get_backend(self, backend, backend_dir):
+		if   backend == 'torch'     : result = TorchBackend(self.model_name)
+		elif backend == 'onnx'      : result = OnnxBackend(self.model_name, backend_dir, quantize=False)
+		elif backend == 'onnx-int8' : result = OnnxBackend(self.model_name, backend_dir, quantize=True)
+		else                        : raise ValueError(f'Unknown encoder backend `{backend}`')
+		return result
+
 	# Centralized tokenizer to keep truncation/padding consistent
 	# ----------------------------------------------------------------------
 	def _tokenize(self, texts, padding):
@@ -41,10 +71,176 @@ class Encoder:
 			max_length     = self.tokenizer.model_max_length
 		)
 
+	# Tokenize texts into unpadded input id lists
+	# ----------------------------------------------------------------------
+	def _tokenize_ids(self, texts):
+		tokens = self.tokenizer(
+			texts,
+			padding    = False,
+			truncation = True,
+			max_length = self.tokenizer.model_max_length
+		)
+		return tokens['input_ids']
+
+	# Split texts into overlapping token windows that fit the model
+	# ----------------------------------------------------------------------
+	def _tokenize_windows(self, texts):
+		'''
+		Returns (ids_list, owners):
+			ids_list[i] : input ids of window i, with special tokens
+			owners[i]   : index of the text window i belongs to
+		'''
+		tokens = self.tokenizer(
+			texts,
+			padding                   = False,
+			truncation                = True,
+			max_length                = self.tokenizer.model_max_length,
+			stride                    = self.window_overlap,
+			return_overflowing_tokens = True
+		)
+
+		ids_list = tokens['input_ids']
+		owners   = tokens['overflow_to_sample_mapping']
+
+		return ids_list, owners
+
+	# Pool window AP vectors back into one AP vector per text
+	# ----------------------------------------------------------------------
+	def _pool_windows(self, ap_windows, ids_list, owners, n_texts, window_pooling):
+		'''
+		window_pooling:
+			- 'length'    → mean of windows weighted by token count
+			- 'attention' → softmax over window similarity to length-weighted mean
+		'''
+		owners  = torch.tensor(owners, device=ap_windows.device)
+		lengths = torch.tensor([len(ids) for ids in ids_list], dtype=ap_windows.dtype, device=ap_windows.device)
+		weights = lengths / ap_windows.new_zeros(n_texts).index_add_(0, owners, lengths)[owners]
+
+		if window_pooling == 'attention':
+			query   = ap_windows.new_zeros(n_texts, self.dim).index_add_(0, owners, weights.unsqueeze(1) * ap_windows)
+			scores  = (ap_windows * query[owners]).sum(dim=1) / math.sqrt(self.dim)
+			peak    = ap_windows.new_zeros(n_texts).scatter_reduce_(0, owners, scores, 'amax', include_self=False)
+			scores  = (scores - peak[owners]).exp()
+			weights = scores / ap_windows.new_zeros(n_texts).index_add_(0, owners, scores)[owners]
+
+		ap_next = ap_windows.new_zeros(n_texts, self.dim).index_add_(0, owners, weights.unsqueeze(1) * ap_windows)
+		return Norm.to_hypercube(ap_next)
+
+	# Pad input id lists into a model-ready batch on device
+	# ----------------------------------------------------------------------
+	def _collate(self, ids_batch):
+		tokens = self.tokenizer.pad(
+			{'input_ids': ids_batch},
+			padding        = True,
+			return_tensors = 'pt'
+		)
+		return {k: v.to(self.backend.device) for k, v in tokens.items()}
+
+	# Split input ids into length-sorted buckets under padded token budget
+	# ----------------------------------------------------------------------
+	def _get_buckets(self, ids_list, max_batch_tokens):
+		order   = sorted(range(len(ids_list)), key=lambda i: len(ids_list[i]))
+		buckets = []
+		bucket  = []
+
+		for i in order:
+			width = len(ids_list[i])  # Widest in bucket, since order is ascending
+			if bucket and (len(bucket) + 1) * width > max_batch_tokens:
+				buckets.append(bucket)
+				bucket = []
+			bucket.append(i)
+
+		if bucket:
+			buckets.append(bucket)
+
+		return buckets
+
+	# Run model over collated batch and pool all rows at once
+	# ----------------------------------------------------------------------
+	def _forward_pool(self, tokens, with_attentions):
+		hidden, cls = self.backend.forward(tokens, with_attentions)  # [B, S, D], [B, S] or None
+		mask        = tokens['attention_mask'].to(hidden.device)      # [B, S]
+
+		ap_next = self.attention_pool_batch(hidden, mask, cls)
+		return ap_next.cpu()
+
+	# Encode input id lists bucket by bucket, restoring original order
+	# ----------------------------------------------------------------------
+	def _encode_ids(self, ids_list, with_attentions, max_batch_tokens=None):
+		if max_batch_tokens is None : buckets = [list(range(len(ids_list)))]
+		else                        : buckets = self._get_buckets(ids_list, max_batch_tokens)
+
+		result  = None
+		pending = self.prefetcher.submit(self._collate, [ids_list[i] for i in buckets[0]])
+
+		for n, bucket in enumerate(buckets):
+			tokens = pending.result()
+
+			if n + 1 < len(buckets):
+				pending = self.prefetcher.submit(self._collate, [ids_list[i] for i in buckets[n + 1]])
+
+			ap_bucket = self._forward_pool(tokens, with_attentions)
+
+			if result is None:
+				result = ap_bucket.new_empty(len(ids_list), ap_bucket.size(1))
+
+			result[bucket] = ap_bucket
+
+		return result
+
+	# Get cache key of static (context-free) AP vector for text
+	# ----------------------------------------------------------------------
+	def _get_cache_key(self, text, with_attentions, window_pooling=None):
+		mode = 'attention' if with_attentions else 'mean'
+		mode = f'{mode}@{self.backend.name}'
+
+		if window_pooling is not None:
+			mode = f'{mode}+window-{window_pooling}-{self.window_overlap}'
+
+		return EmbeddingCache.get_key(self.model_name, mode, text)
+
+	# Encode texts without cache: truncated or windowed
+	# ----------------------------------------------------------------------
+	def _encode_texts(self, texts, with_attentions, max_batch_tokens=None, window_pooling=None):
+		if window_pooling is None:
+			ids_list = self._tokenize_ids(texts)
+			ap_next  = self._encode_ids(ids_list, with_attentions, max_batch_tokens)
+		else:
+			ids_list, owners = self._tokenize_windows(texts)
+			ap_windows       = self._encode_ids(ids_list, with_attentions, max_batch_tokens)
+			ap_next          = self._pool_windows(ap_windows, ids_list, owners, len(texts), window_pooling)
+
+		return ap_next
+
+	# Encode static AP vectors: dedupe texts, serve cache hits, encode misses once
+	# ----------------------------------------------------------------------
+	def _encode_static(self, texts, with_attentions, max_batch_tokens=None, window_pooling=None, encode_missing=None):
+		'''
+		encode_missing: callable(texts, with_attentions, max_batch_tokens, window_pooling)
+		                encoding cache misses, defaults to in-process _encode_texts
+		'''
+		encode_missing = encode_missing or self._encode_texts
+
+		unique  = list(dict.fromkeys(texts))
+		keys    = {text: self._get_cache_key(text, with_attentions, window_pooling) for text in unique}
+		found   = self.cache.get_many(list(keys.values())) if self.cache else {}
+		vectors = {text: found[keys[text]] for text in unique if keys[text] in found}
+		missing = [text for text in unique if text not in vectors]
+
+		if missing:
+			ap_missing = encode_missing(missing, with_attentions, max_batch_tokens, window_pooling)
+			fresh      = dict(zip(missing, ap_missing.float()))
+			vectors.update(fresh)
+
+			if self.cache:
+				self.cache.set_many({keys[text]: vector for text, vector in fresh.items()})
+
+		return torch.stack([vectors[text] for text in texts])
+
 	# Get amp
 	# ----------------------------------------------------------------------
 	def _get_amp(self, with_attentions):
-		amp_ctx = torch.cuda.amp.autocast if device.type == 'cuda' else contextlib.nullcontext
+		amp_ctx = torch.cuda.amp.autocast if self.backend.device.type == 'cuda' else contextlib.nullcontext
 		amp     = amp_ctx if with_attentions else contextlib.nullcontext
 		return amp
 	
@@ -52,20 +248,31 @@ class Encoder:
 	# PUBLIC METHODS
 	# ======================================================================
 
+	# Constructor options to rebuild an equivalent encoder (without cache)
+	# ----------------------------------------------------------------------
+	def get_config(self):
+		return {
+			'model_name'       : self.model_name,
+			'max_batch_tokens' : self.max_batch_tokens,
+			'window_overlap'   : self.window_overlap,
+			'backend'          : self.backend.name,
+			'backend_dir'      : self.backend_dir
+		}
+
 	# Pool hidden states into a single AP vector
 	# ----------------------------------------------------------------------
-	def attention_pool(self, hidden_states, attentions=None):
+	def attention_pool(self, hidden_states, cls_attention=None):
 		'''
 		hidden_states: [S, D]
-		attentions:
-			- None            → fast pooling (no attentions)
-			- list of tensors → attention pooling (full mode)
+		cls_attention:
+			- None → fast pooling (no attentions)
+			- [S]  → attention pooling over layer/head-averaged CLS attention row
 		'''
 
 		# ----------------------------------------------------------------------
 		# FAST PATH: no attentions
 		# ----------------------------------------------------------------------
-		if attentions is None:
+		if cls_attention is None:
 			# Simple mean pooling over sequence
 			ap_next = hidden_states.mean(dim=0)
 			return Norm.to_hypercube(ap_next)
@@ -73,21 +280,37 @@ class Encoder:
 		# ----------------------------------------------------------------------
 		# FULL PATH: attention pooling
 		# ----------------------------------------------------------------------
-		att = torch.stack(attentions)   # [L, B, H, S, S]
-		att = att[:, 0]                 # [L, H, S, S]
-		att = att.mean(dim=1)           # [L, S, S]
-		att = att.mean(dim=0)           # [S, S]
-
-		weights = att[0]
-		weights = F.softmax(weights, dim=0)
+		weights = F.softmax(cls_attention, dim=0)
 
 		ap_next = (weights.unsqueeze(1) * hidden_states).sum(dim=0)
 		return Norm.to_hypercube(ap_next)
 
+	# Pool batch of padded hidden states into AP vectors
+	# ----------------------------------------------------------------------
+	def attention_pool_batch(self, hidden_states, attention_mask, cls_attention=None):
+		'''
+		hidden_states  : [B, S, D]
+		attention_mask : [B, S]
+		cls_attention:
+			- None   → fast masked mean pooling
+			- [B, S] → masked softmax over layer/head-averaged CLS attention row
+		Row b equals attention_pool(hidden_states[b, :len_b], cls_attention[b, :len_b]).
+		'''
+		mask = attention_mask.unsqueeze(-1).to(hidden_states.dtype)  # [B, S, 1]
+
+		if cls_attention is None:
+			ap_next = (hidden_states * mask).sum(dim=1) / mask.sum(dim=1)
+		else:
+			weights = cls_attention.masked_fill(attention_mask == 0, float('-inf'))
+			weights = F.softmax(weights, dim=1)
+			ap_next = (weights.unsqueeze(-1) * hidden_states).sum(dim=1)
+
+		return Norm.to_hypercube(ap_next)
+
 	# Eval mode
 	# ----------------------------------------------------------------------
 	def eval(self):
-		return self.model.eval()
+		return self.backend.eval()
 
 	# Encode a single text
 	# ----------------------------------------------------------------------
@@ -95,21 +318,45 @@ class Encoder:
 		amp = self._get_amp(with_attentions)
 
 		with torch.inference_mode(), amp():
-			tokens = self._tokenize(text, padding=False)
-			tokens = {k: v.to(device) for k, v in tokens.items()}
+			key     = self._get_cache_key(text, with_attentions)
+			ap_next = self.cache.get(key) if self.cache else None
+
+			if ap_next is None:
+				tokens = self._tokenize(text, padding=False)
+				tokens = {k: v.to(self.backend.device) for k, v in tokens.items()}
+
+				hidden, cls = self.backend.forward(tokens, with_attentions)
+				cls         = cls.squeeze(0) if cls is not None else None
+				ap_next     = self.attention_pool(hidden.squeeze(0), cls)
+
+				if self.cache:
+					self.cache.set(key, ap_next)
+			else:
+				ap_next = ap_next.clone()  # Callers may change result in place: keep cache entry intact
 
-			out     = self.model(**tokens, output_attentions=with_attentions)
-			hidden  = out.last_hidden_state.squeeze(0)
-			attn    = out.attentions if with_attentions else None
-			ap_next = self.attention_pool(hidden, attn)
+			ap_next = ap_next.to(self.backend.device)
 
 			if ap_prev is not None:
-				ap_prev = ap_prev.to(device)
+				ap_prev = ap_prev.to(self.backend.device)
 				ap_next = ap_next + karma * ap_prev
 				ap_next = Norm.to_hypercube(ap_next)
 
 		return ap_next.to('cpu')
 
+	# Encode a single text, micro-batched with concurrent callers
+	# ----------------------------------------------------------------------
+	async def encode_async(self, text, ap_prev=None, karma=1):
+		loop = asyncio.get_running_loop()
+
+		if self.batcher is None or self.batcher.loop is not loop:
+			self.batcher = EncoderBatcher(
+				self,
+				max_batch_size = self.async_batch_size,
+				max_wait_ms    = self.async_wait_ms
+			)
+
+		return await self.batcher.encode(text, ap_prev=ap_prev, karma=karma)
+
 	# Encode a sequence of texts (naive)
 	# ----------------------------------------------------------------------
 	def encode_sequence(self, texts, ap_prev=None, karma=1, with_attentions=True):
@@ -131,11 +378,21 @@ class Encoder:
 	
 	# Encode a sequence of texts (as batch)
 	# ----------------------------------------------------------------------
-	def encode_sequence_batch(self, texts, ap_prev=None, karma=1, with_attentions=True):
+	def encode_sequence_batch(
+		self,
+		texts,
+		ap_prev          = None,
+		karma            = 1,
+		with_attentions  = True,
+		max_batch_tokens = None,
+		window_pooling   = None
+	):
 		ap_static = self.encode_batch(
 			texts,
-			karma           = karma,
-			with_attentions = with_attentions
+			karma            = karma,
+			with_attentions  = with_attentions,
+			max_batch_tokens = max_batch_tokens,
+			window_pooling   = window_pooling
 		)
 
 		ap_next = self.apply_batch_context(
@@ -148,47 +405,38 @@ class Encoder:
 
 	# Encode a batch of texts (optionally with attentions)
 	# ----------------------------------------------------------------------
-	def encode_batch(self, texts, ap_prev_batch=None, karma=1, with_attentions=True):
-		amp = self._get_amp(with_attentions)
+	def encode_batch(
+		self,
+		texts,
+		ap_prev_batch    = None,
+		karma            = 1,
+		with_attentions  = True,
+		max_batch_tokens = None,
+		window_pooling   = None
+	):
+		'''
+		max_batch_tokens:
+			- None → self.max_batch_tokens
+			- int  → sort texts by token length, encode in buckets of
+			         at most max_batch_tokens padded tokens, restore order
+		window_pooling:
+			- None                    → truncate texts at model_max_length
+			- 'length' | 'attention'  → split long texts into overlapping windows,
+			                            encode all windows in shared batches and
+			                            pool them back into one AP vector per text
+		'''
+		amp              = self._get_amp(with_attentions)
+		max_batch_tokens = max_batch_tokens or self.max_batch_tokens
 
 		with torch.inference_mode(), amp():
-			# Tokenize
-			tokens = self._tokenize(texts, padding=True)
-			tokens = {k: v.to(device) for k, v in tokens.items()}
-
-			out = self.model(**tokens, output_attentions=with_attentions)
-
-			hidden = out.last_hidden_state      # [B, S, D]
-			attns  = out.attentions             # tuple(L) of [B, H, S, S] or None
-			mask   = tokens['attention_mask']   # [B, S]
-
-			ap_list = []
-			B = hidden.size(0)
-
-			for b in range(B):
-				seq_len  = mask[b].sum().item()
-				hidden_b = hidden[b, :seq_len]
-
-				if with_attentions:
-					# Build tuple of [1, H, S, S] tensors as attention_pool expects
-					att_b = tuple(
-						layer[b, :, :seq_len, :seq_len].unsqueeze(0)
-						for layer in attns
-					)
-				else:
-					att_b = None
+			ap_next = self._encode_static(texts, with_attentions, max_batch_tokens, window_pooling)
 
-				ap_next = self.attention_pool(hidden_b, att_b)
-
-				# Optional recurrence (batch-wise)
-				if ap_prev_batch is not None:
-					ap_prev = ap_prev_batch[b].to(device)
-					ap_next = ap_next + karma * ap_prev
-					ap_next = Norm.to_hypercube(ap_next)
-
-				ap_list.append(ap_next.cpu())
+			# Optional recurrence (batch-wise)
+			if ap_prev_batch is not None:
+				ap_next = ap_next + karma * ap_prev_batch.to(ap_next.device)
+				ap_next = Norm.to_hypercube(ap_next)
 
-		return torch.stack(ap_list)
+		return ap_next
 
 	# Apply left-to-right AP context over batch-encoded AP vectors
 	# ----------------------------------------------------------------------
@@ -198,69 +446,63 @@ class Encoder:
 
 		This is mathematically identical to encode_sequence(texts, ap_prev),
 		assuming ap_static_batch[i] == encode(texts[i], prev_ap=None).
+		Long documents can be processed chunk by chunk: pass the last row of
+		the previous chunk as ap_prev.
 		'''
 
-		n          = ap_static_batch.size(0)
-		ap_dynamic = []
-
-		prev = ap_prev
-
-		for i in range(n):
-			ap_next = ap_static_batch[i]
-
-			if prev is not None:
-				ap_next = ap_next + karma * prev
-				ap_next = Norm.to_hypercube(ap_next)
-
-			ap_dynamic.append(ap_next)
-			prev = ap_next
-
-		return torch.stack(ap_dynamic)
+		return ContextScan.apply(ap_static_batch, ap_prev=ap_prev, karma=karma)
 	
 	# ======================================================================
 	# TEST METHODS
 	# ======================================================================
 
-	# Test function to see if batch encode is semantically equal to single encode
+	# Test that encode_batch matches encode row by row (regression check);
+	# atol None → backend tolerance (looser for int8 quantized backend)
 	# ----------------------------------------------------------------------
-	def test_encode_batch(self, texts, sample_size=20, batch_size=32):
+	def test_encode_batch(self, texts, sample_size=20, max_batch_tokens=None, atol=None):
 		import random
 		import torch.nn.functional as F
 
+		atol = self.backend.batch_atol if atol is None else atol
+
 		# choose sample
 		if len(texts) > sample_size : sample = random.sample(texts, sample_size)
 		else                        : sample = texts
 
-		print('\n=== encode() vs encode_batch_magic() consistency test ===')
+		print(f'\n=== encode() vs encode_batch() consistency test ({self.backend.name}, atol={atol:.0e}) ===')
 		print(f'Comparing {len(sample)} texts...\n')
 
-		# 1) magic batch encode (no padding → identical)
-		ap_batch = self.encode_batch(sample)
+		# Compare real encodes, not cached vectors
+		cache, self.cache = self.cache, None
 
-		sims = []
+		try:
+			# 1) Batched path: padding + masked pooling over whole batch
+			ap_batch = self.encode_batch(sample, max_batch_tokens=max_batch_tokens)
 
-		# 2) compare one-by-one
-		for i, t in enumerate(sample):
-			ap_single = self.encode(t)
-			ap_b      = ap_batch[i]
-
-			sim = F.cosine_similarity(
-				ap_single.unsqueeze(0),
-				ap_b.unsqueeze(0)
-			).item()
+			# 2) Reference: one-by-one, no padding
+			ap_single = torch.stack([self.encode(t) for t in sample])
+		finally:
+			self.cache = cache
 
-			sims.append(sim)
-			print(f'[{i:02d}] sim={sim:.6f} | text={t}')
+		sims  = F.cosine_similarity(ap_single, ap_batch)
+		diffs = (ap_single - ap_batch).abs().max(dim=1).values
 
-		sims = torch.tensor(sims)
+		for i, t in enumerate(sample):
+			print(f'[{i:02d}] sim={sims[i].item():.6f} diff={diffs[i].item():.2e} | text={t}')
 
 		print('\n=== Summary ===')
 		print(f'Min similarity  : {sims.min().item():.6f}')
-		print(f'Max similarity  : {sims.max().item():.6f}')
 		print(f'Mean similarity : {sims.mean().item():.6f}')
+		print(f'Max abs diff    : {diffs.max().item():.2e}')
 
+		if not torch.allclose(ap_single, ap_batch, atol=atol):
+			raise AssertionError(
+				f'encode_batch mismatch: max_diff={diffs.max().item()}'
+			)
+
+		print('\n✓ encode_batch matches encode')
 		return sims
-	
+
 	# Test that encode_sequence == encode_batch + apply_batch_context
 	# ----------------------------------------------------------------------
 	def test_apply_batch_context(self, texts, ap_prev=None, karma=1, atol=1e-6):
@@ -312,6 +554,84 @@ class Encoder:
 				f'apply_batch_context mismatch: max_diff={max_diff}'
 			)
 
+		# 4) Chunked continuation must reproduce single pass exactly
+		half     = len(texts) // 2
+		ap_head  = self.apply_batch_context(ap_static[:half], ap_prev=ap_prev, karma=karma)
+		ap_tail  = self.apply_batch_context(ap_static[half:], ap_prev=ap_head[-1] if half else ap_prev, karma=karma)
+		ap_chunk = torch.cat([ap_head, ap_tail])
+
+		if not torch.equal(ap_chunk, ap_ctx):
+			raise AssertionError('apply_batch_context chunked continuation mismatch')
+
 		print('\n✓ apply_batch_context is EXACTLY equivalent to encode_sequence')
 		return True
 
+
+	# Test drift of this encoder's backend against PyTorch backend
+	# ----------------------------------------------------------------------
+	def test_backend_drift(self, texts, reference=None, min_similarity=0.99):
+		import torch.nn.functional as F
+
+		reference = reference or Encoder(self.model_name, max_batch_tokens=self.max_batch_tokens)
+
+		print(f'\n=== `{self.backend.name}` vs `{reference.backend.name}` drift test ===')
+		print(f'Texts: {len(texts)}\n')
+
+		# Compare real encodes, not cached vectors
+		cache, self.cache = self.cache, None
+
+		try:
+			ap_test = self.encode_batch(texts)
+			ap_ref  = reference.encode_batch(texts)
+		finally:
+			self.cache = cache
+
+		sims  = F.cosine_similarity(ap_test, ap_ref)
+		diffs = (ap_test - ap_ref).abs().max(dim=1).values
+
+		print(f'Min similarity  : {sims.min().item():.6f}')
+		print(f'Mean similarity : {sims.mean().item():.6f}')
+		print(f'Max abs diff    : {diffs.max().item():.2e}')
+
+		if self.backend.name != 'torch' and self.backend.drift is not None:
+			print(f'Export drift    : {self.backend.drift}')
+
+		if sims.min().item() < min_similarity:
+			raise AssertionError(
+				f'`{self.backend.name}` drift too large: min_similarity={sims.min().item()}'
+			)
+
+		print(f'\n✓ `{self.backend.name}` is within drift tolerance')
+		return sims
+
+	# Compare encode_batch throughput of this encoder and PyTorch backend
+	# ----------------------------------------------------------------------
+	def test_backend_throughput(self, texts, reference=None, repeats=3):
+		import time
+
+		reference = reference or Encoder(self.model_name, max_batch_tokens=self.max_batch_tokens)
+		results   = {}
+
+		print(f'\n=== `{self.backend.name}` vs `{reference.backend.name}` throughput test ===')
+		print(f'Texts: {len(texts)}, repeats: {repeats}\n')
+
+		for encoder in (reference, self):
+			# Measure real encodes, not cached vectors
+			cache, encoder.cache = encoder.cache, None
+
+			try:
+				encoder.encode_batch(texts[:8])  # Warmup
+				start = time.perf_counter()
+				for _ in range(repeats):
+					encoder.encode_batch(texts)
+				elapsed = time.perf_counter() - start
+			finally:
+				encoder.cache = cache
+
+			results[encoder.backend.name] = len(texts) * repeats / elapsed
+			print(f'{encoder.backend.name:<10}: {results[encoder.backend.name]:.1f} texts/s')
+
+		speedup = results[self.backend.name] / results[reference.backend.name]
+		print(f'\nSpeedup    : {speedup:.2f}x')
+
+		return results
@@ -0,0 +1,3 @@
+from .torch_backend import TorchBackend
+from .onnx_backend  import OnnxBackend
+from .cls_attention_capture import ClsAttentionCapture
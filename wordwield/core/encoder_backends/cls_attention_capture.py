@@ -0,0 +1,92 @@
+# ======================================================================
+# Forward hooks capturing only the CLS-query attention row per layer,
+# so the model itself can run on fused SDPA kernels.
+# ======================================================================
+
+import math
+import threading
+from functools import partial
+
+import torch
+import torch.nn.functional as F
+
+
+class ClsAttentionCapture:
+	def __init__(self, model):
+		self.state   = threading.local()  # Per-thread capture: mask, cls query, sum over layers
+		self.handles = []
+		self.layers  = 0                  # Self-attention modules hooked
+
+		for module in model.modules():
+			if self._is_self_attention(module):
+				self.handles.append(module.query.register_forward_hook(self._on_query))
+				self.handles.append(module.key.register_forward_hook(partial(self._on_key, module)))
+				self.layers += 1
+
+	# ======================================================================
+	# PRIVATE METHODS
+	# ======================================================================
+
+	# Check module is BERT-style self-attention with query/key projections
+	# ----------------------------------------------------------------------
+	def _is_self_attention(self, module):
+		return (
+			isinstance(getattr(module, 'query', None), torch.nn.Linear) and
+			isinstance(getattr(module, 'key',   None), torch.nn.Linear) and
+			hasattr(module, 'num_attention_heads') and
+			hasattr(module, 'attention_head_size')
+		)
+
+	# Keep CLS row of query projection
+	# ----------------------------------------------------------------------
+	def _on_query(self, module, args, output):
+		if getattr(self.state, 'mask', None) is not None:
+			self.state.query = output[:, :1]  # [B, 1, D]
+
+	# Combine CLS query with key projection into head-averaged attention row
+	# ----------------------------------------------------------------------
+	def _on_key(self, attention, module, args, output):
+		if getattr(self.state, 'mask', None) is not None:
+			B, S, _ = output.shape
+			H       = attention.num_attention_heads
+			d       = attention.attention_head_size
+
+			q = self.state.query.view(B, 1, H, d).transpose(1, 2)  # [B, H, 1, d]
+			k = output.view(B, S, H, d).transpose(1, 2)            # [B, H, S, d]
+
+			scores = (q @ k.transpose(-1, -2)).squeeze(2) / math.sqrt(d)              # [B, H, S]
+			scores = scores.masked_fill(self.state.mask[:, None, :] == 0, float('-inf'))
+			row    = F.softmax(scores.float(), dim=-1).mean(dim=1)                   # [B, S]
+
+			self.state.total  = row if self.state.total is None else self.state.total + row
+			self.state.layers += 1
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Start capturing for forward pass with given padding mask
+	# ----------------------------------------------------------------------
+	def start(self, attention_mask):
+		self.state.mask   = attention_mask
+		self.state.query  = None
+		self.state.total  = None
+		self.state.layers = 0
+
+	# Stop capturing, return layer/head-averaged CLS attention row [B, S]
+	# ----------------------------------------------------------------------
+	def stop(self):
+		result = self.state.total / self.state.layers
+
+		self.state.mask  = None
+		self.state.query = None
+		self.state.total = None
+
+		return result
+
+	# Remove hooks from model
+	# ----------------------------------------------------------------------
+	def remove(self):
+		for handle in self.handles:
+			handle.remove()
+		self.handles = []
@@ -0,0 +1,162 @@
+# ======================================================================
+# ONNX Runtime encoder backend with optional dynamic int8 quantization.
+# Exports the model once, checks drift against PyTorch at export time.
+# ======================================================================
+
+import os
+import json
+
+import torch
+from transformers import AutoModel
+
+from wordwield.core.encoder_backends.onnx_export_model import OnnxExportModel
+
+
+class OnnxBackend:
+	device = torch.device('cpu')
+
+	def __init__(self, model_name, path, quantize=False, threads=None):
+		self.name       = 'onnx-int8' if quantize else 'onnx'
+		self.path       = path      # Directory of exported graphs
+		self.quantize   = quantize  # Apply dynamic int8 quantization to weights
+		self.drift      = None      # Drift against PyTorch measured at export
+		self.batch_atol = 1e-3 if quantize else 1e-5  # Batch vs single encode tolerance: int8 activations are quantized per batch, padding shifts their range
+
+		model_path = self._get_model_path(model_name, quantize)
+
+		if not os.path.exists(model_path):
+			self._export(model_name, model_path)
+
+		self.drift   = self._read_drift(model_path)
+		self.session = self._get_session(model_path, threads)
+		self.dim     = self.session.get_outputs()[0].shape[-1]
+
+	# ======================================================================
+	# PRIVATE METHODS
+	# ======================================================================
+
+	# Get path of exported graph for model
+	# ----------------------------------------------------------------------
+	def _get_model_path(self, model_name, quantize):
+		slug   = model_name.strip('/').replace('/', '__')
+		suffix = '.int8.onnx' if quantize else '.onnx'
+		return os.path.join(self.path, f'{slug}{suffix}')
+
+	# Create CPU inference session
+	# ----------------------------------------------------------------------
+	def _get_session(self, model_path, threads):
+		import onnxruntime
+
+		options = onnxruntime.SessionOptions()
+		options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+		options.intra_op_num_threads     = threads or 0  # 0 → runtime default
+
+		return onnxruntime.InferenceSession(
+			model_path,
+			sess_options = options,
+			providers    = ['CPUExecutionProvider']
+		)
+
+	# Build padded probe batch of random token ids
+	# ----------------------------------------------------------------------
+	def _get_probe_tokens(self, vocab_size, batch_size=4, seq_len=32):
+		generator = torch.Generator().manual_seed(0)
+		input_ids = torch.randint(5, vocab_size, (batch_size, seq_len), generator=generator)
+		mask      = torch.ones_like(input_ids)
+
+		for b in range(1, batch_size):
+			mask[b, seq_len - b * seq_len // batch_size:] = 0  # Padded tails of different length
+
+		return input_ids, mask
+
+	# Export model to ONNX, optionally quantize, record drift
+	# ----------------------------------------------------------------------
+	def _export(self, model_name, model_path):
+		os.makedirs(self.path, exist_ok=True)
+
+		model     = AutoModel.from_pretrained(model_name, attn_implementation='eager').eval()
+		wrapper   = OnnxExportModel(model)
+		fp32_path = self._get_model_path(model_name, False)
+		probe     = self._get_probe_tokens(model.config.vocab_size)
+
+		with torch.inference_mode():
+			reference = wrapper(*probe)  # Before export, tracing may alter model state
+
+		if not os.path.exists(fp32_path):
+			torch.onnx.export(
+				wrapper,
+				probe,
+				fp32_path,
+				input_names   = ['input_ids', 'attention_mask'],
+				output_names  = ['hidden', 'cls_attention'],
+				dynamic_axes  = {
+					'input_ids'      : {0: 'batch', 1: 'sequence'},
+					'attention_mask' : {0: 'batch', 1: 'sequence'},
+					'hidden'         : {0: 'batch', 1: 'sequence'},
+					'cls_attention'  : {0: 'batch', 1: 'sequence'}
+				},
+				opset_version = 17,
+				dynamo        = False
+			)
+
+		if self.quantize:
+			from onnxruntime.quantization import quantize_dynamic, QuantType
+			quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+
+		self._write_drift(model_path, self._measure_drift(reference, model_path, probe))
+
+	# Compare ONNX outputs against PyTorch on probe batch
+	# ----------------------------------------------------------------------
+	def _measure_drift(self, reference, model_path, probe):
+		input_ids, mask     = probe
+		hidden_ref, cls_ref = reference
+		session             = self._get_session(model_path, None)
+
+		hidden, cls = self.forward({'input_ids': input_ids, 'attention_mask': mask}, True, session)
+
+		valid = mask.bool()
+		sims  = torch.nn.functional.cosine_similarity(hidden[valid], hidden_ref[valid], dim=-1)
+
+		return {
+			'hidden_cos_min'  : sims.min().item(),
+			'hidden_cos_mean' : sims.mean().item(),
+			'cls_max_diff'    : (cls - cls_ref).abs()[valid].max().item()
+		}
+
+	# Store drift report next to exported graph
+	# ----------------------------------------------------------------------
+	def _write_drift(self, model_path, drift):
+		with open(f'{model_path}.drift.json', 'w') as f:
+			json.dump(drift, f, indent=4)
+
+	# Load drift report stored next to exported graph
+	# ----------------------------------------------------------------------
+	def _read_drift(self, model_path):
+		drift = None
+		path  = f'{model_path}.drift.json'
+
+		if os.path.exists(path):
+			with open(path, 'r') as f:
+				drift = json.load(f)
+
+		return drift
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Eval mode (graph is inference-only)
+	# ----------------------------------------------------------------------
+	def eval(self):
+		return self
+
+	# Run graph, return hidden states [B, S, D] and CLS attention [B, S] or None
+	# ----------------------------------------------------------------------
+	def forward(self, tokens, with_attentions, session=None):
+		session = session or self.session
+		feeds   = {name: tokens[name].cpu().numpy() for name in ('input_ids', 'attention_mask')}
+
+		hidden, cls = session.run(None, feeds)
+		cls         = torch.from_numpy(cls) if with_attentions else None
+
+		return torch.from_numpy(hidden), cls
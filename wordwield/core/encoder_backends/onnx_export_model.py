@@ -0,0 +1,27 @@
+# ======================================================================
+# Export wrapper exposing hidden states and CLS attention row as outputs.
+# ======================================================================
+
+import torch
+
+
+class OnnxExportModel(torch.nn.Module):
+	def __init__(self, model):
+		super().__init__()
+		self.model = model
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Return last hidden state [B, S, D] and layer/head-averaged CLS attention [B, S]
+	# ----------------------------------------------------------------------
+	def forward(self, input_ids, attention_mask):
+		out = self.model(
+			input_ids         = input_ids,
+			attention_mask    = attention_mask,
+			output_attentions = True
+		)
+		att = torch.stack([layer[:, :, 0] for layer in out.attentions])  # [L, B, H, S]
+		att = att.mean(dim=2).mean(dim=0)                                # [B, S]
+		return out.last_hidden_state, att
@@ -0,0 +1,67 @@
+# ======================================================================
+# PyTorch encoder backend: fused SDPA attention with CLS attention row
+# captured by hooks, eager attention as fallback for other architectures.
+# ======================================================================
+
+import torch
+from transformers import AutoModel
+
+from wordwield.core.device import device
+from wordwield.core.encoder_backends.cls_attention_capture import ClsAttentionCapture
+
+
+class TorchBackend:
+	name       = 'torch'
+	device     = device
+	drift      = None  # Reference backend, no drift
+	batch_atol = 1e-5  # Batch vs single encode tolerance (Encoder.test_encode_batch)
+
+	def __init__(self, model_name, attention='sdpa'):
+		self.model   = AutoModel.from_pretrained(model_name, attn_implementation=attention).to(device)
+		self.dim     = self.model.config.hidden_size
+		self.capture = None  # CLS attention hooks, None → full eager attentions
+
+		if attention != 'eager':
+			self.capture = ClsAttentionCapture(self.model)
+			if not self.capture.layers:  # Unknown self-attention layout
+				self.capture.remove()
+				self.capture = None
+				self.model   = AutoModel.from_pretrained(model_name, attn_implementation='eager').to(device)
+
+		self.model.eval()
+
+	# ======================================================================
+	# PRIVATE METHODS
+	# ======================================================================
+
+	# Reduce attentions to layer- and head-averaged CLS attention row
+	# ----------------------------------------------------------------------
+	def _get_cls_attention(self, attentions):
+		att = torch.stack([layer[:, :, 0] for layer in attentions])  # [L, B, H, S]
+		att = att.mean(dim=2)                                        # [L, B, S]
+		att = att.mean(dim=0)                                        # [B, S]
+		return att
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Eval mode
+	# ----------------------------------------------------------------------
+	def eval(self):
+		return self.model.eval()
+
+	# Run model, return hidden states [B, S, D] and CLS attention [B, S] or None
+	# ----------------------------------------------------------------------
+	def forward(self, tokens, with_attentions):
+		if with_attentions and self.capture is not None:
+			self.capture.start(tokens['attention_mask'])
+			try:
+				out = self.model(**tokens)
+			finally:
+				cls = self.capture.stop()
+		else:
+			out = self.model(**tokens, output_attentions=with_attentions)
+			cls = self._get_cls_attention(out.attentions) if with_attentions else None
+
+		return out.last_hidden_state, cls
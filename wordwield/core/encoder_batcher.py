@@ -0,0 +1,75 @@
+# ======================================================================
+# Async micro-batching front-end: collects concurrent encode requests
+# for a few milliseconds and resolves them with one batched forward pass.
+# ======================================================================
+
+import asyncio
+
+from wordwield.core.norm import Norm
+
+
+class EncoderBatcher:
+	def __init__(self, encoder, max_batch_size=32, max_wait_ms=5):
+		self.encoder        = encoder
+		self.max_batch_size = max_batch_size        # Requests per forward pass
+		self.max_wait       = max_wait_ms / 1000    # Seconds to wait for more requests
+		self.loop           = asyncio.get_running_loop()
+		self.queue          = asyncio.Queue()       # (text, ap_prev, karma, future)
+		self.collector      = self.loop.create_task(self._collect())
+
+	# ======================================================================
+	# PRIVATE METHODS
+	# ======================================================================
+
+	# Gather requests until batch is full or wait time is over
+	# ----------------------------------------------------------------------
+	async def _get_batch(self):
+		batch    = [await self.queue.get()]
+		deadline = self.loop.time() + self.max_wait
+		timeout  = self.max_wait
+
+		while len(batch) < self.max_batch_size and timeout > 0:
+			try:
+				batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+				timeout = deadline - self.loop.time()
+			except asyncio.TimeoutError:
+				timeout = 0
+
+		return batch
+
+	# Encode batch off the event loop and resolve callers' futures
+	# ----------------------------------------------------------------------
+	async def _run(self, batch):
+		texts = [text for text, _, _, _ in batch]
+
+		try:
+			vectors = await asyncio.to_thread(self.encoder.encode_batch, texts)
+
+			for (_, ap_prev, karma, future), ap_next in zip(batch, vectors):
+				if ap_prev is not None:
+					ap_next = Norm.to_hypercube(ap_next + karma * ap_prev.to(ap_next.device))
+				if not future.done():
+					future.set_result(ap_next)
+
+		except Exception as e:
+			for _, _, _, future in batch:
+				if not future.done():
+					future.set_exception(e)
+
+	# Collector loop: one batched forward pass at a time
+	# ----------------------------------------------------------------------
+	async def _collect(self):
+		while True:
+			batch = await self._get_batch()
+			await self._run(batch)
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Queue text for encoding and wait for its AP vector
+	# ----------------------------------------------------------------------
+	async def encode(self, text, ap_prev=None, karma=1):
+		future = self.loop.create_future()
+		await self.queue.put((text, ap_prev, karma, future))
+		return await future
@@ -0,0 +1,129 @@
+# ======================================================================
+# Multi-process encoder pool: shards batches across worker processes,
+# each holding its own model copy with a pinned torch thread count.
+# ======================================================================
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import torch
+
+from wordwield.core.norm import Norm
+
+
+_worker_encoder = None  # Encoder living in worker process
+
+
+# Create worker-local encoder with pinned torch thread count
+# ----------------------------------------------------------------------
+def _init_worker(config, threads):
+	global _worker_encoder
+	from wordwield.core.encoder import Encoder
+
+	torch.set_num_threads(threads)
+	_worker_encoder = Encoder(**config)
+
+# Encode one shard of texts in worker process
+# ----------------------------------------------------------------------
+def _encode_shard(texts, with_attentions, max_batch_tokens, window_pooling):
+	with torch.inference_mode():
+		result = _worker_encoder._encode_texts(texts, with_attentions, max_batch_tokens, window_pooling)
+	return result
+
+
+class EncoderPool:
+	def __init__(self, encoder, workers=None, threads_per_worker=1, shard_size=256):
+		self.encoder    = encoder                                                   # Parent encoder: cache, dedupe, small batches
+		self.threads    = threads_per_worker                                        # Torch threads pinned per worker
+		self.workers    = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+		self.shard_size = shard_size                                                # Texts per worker task
+		self.executor   = ProcessPoolExecutor(
+			max_workers = self.workers,
+			mp_context  = multiprocessing.get_context('spawn'),
+			initializer = _init_worker,
+			initargs    = (encoder.get_config(), threads_per_worker)
+		)
+
+	# ======================================================================
+	# PRIVATE METHODS
+	# ======================================================================
+
+	# Encode texts across workers shard by shard, keeping order
+	# ----------------------------------------------------------------------
+	def _encode_sharded(self, texts, with_attentions, max_batch_tokens, window_pooling):
+		if len(texts) <= self.shard_size:
+			result = self.encoder._encode_texts(texts, with_attentions, max_batch_tokens, window_pooling)
+		else:
+			shards  = [texts[n:n + self.shard_size] for n in range(0, len(texts), self.shard_size)]
+			futures = [
+				self.executor.submit(_encode_shard, shard, with_attentions, max_batch_tokens, window_pooling)
+				for shard in shards
+			]
+			result = torch.cat([future.result() for future in futures])
+
+		return result
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Encode a batch of texts across workers (same API as Encoder.encode_batch)
+	# ----------------------------------------------------------------------
+	def encode_batch(
+		self,
+		texts,
+		ap_prev_batch    = None,
+		karma            = 1,
+		with_attentions  = True,
+		max_batch_tokens = None,
+		window_pooling   = None
+	):
+		max_batch_tokens = max_batch_tokens or self.encoder.max_batch_tokens
+
+		with torch.inference_mode():
+			ap_next = self.encoder._encode_static(
+				texts,
+				with_attentions,
+				max_batch_tokens,
+				window_pooling,
+				encode_missing = self._encode_sharded
+			)
+
+			if ap_prev_batch is not None:
+				ap_next = ap_next + karma * ap_prev_batch.to(ap_next.device)
+				ap_next = Norm.to_hypercube(ap_next)
+
+		return ap_next
+
+	# Encode a sequence of texts across workers (same API as Encoder.encode_sequence_batch)
+	# ----------------------------------------------------------------------
+	def encode_sequence_batch(
+		self,
+		texts,
+		ap_prev          = None,
+		karma            = 1,
+		with_attentions  = True,
+		max_batch_tokens = None,
+		window_pooling   = None
+	):
+		ap_static = self.encode_batch(
+			texts,
+			karma            = karma,
+			with_attentions  = with_attentions,
+			max_batch_tokens = max_batch_tokens,
+			window_pooling   = window_pooling
+		)
+
+		ap_next = self.encoder.apply_batch_context(
+			ap_static,
+			ap_prev = ap_prev,
+			karma   = karma
+		)
+
+		return ap_next
+
+	# Stop worker processes
+	# ----------------------------------------------------------------------
+	def close(self):
+		self.executor.shutdown(wait=True, cancel_futures=True)
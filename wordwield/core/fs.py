@@ -87,7 +87,7 @@ class File:
 			return f.read()
 
 	def _read_html(self):
-		html = self._read_txt(self.path, self.encoding)
+		html = self._read_txt()
 		return BeautifulSoup(html, 'html.parser').get_text(' ', strip=True)
 
 	def _read_pdf(self):
@@ -102,6 +102,27 @@ class File:
 	def _read_docx(self):
 		doc = docx.Document(self.path)
 		return '\n'.join(p.text for p in doc.paragraphs)
+
+	def _iter_txt(self, chunk_size):
+		with open(self.path, 'r', encoding=self.encoding) as f:
+			while chunk := f.read(chunk_size):
+				yield chunk
+
+	def _iter_html(self, chunk_size):
+		yield self._read_html()  # Parser needs whole document
+
+	def _iter_pdf(self, chunk_size):
+		with pdfplumber.open(self.path) as pdf:
+			for page in pdf.pages:
+				text = page.extract_text()
+				if text:
+					yield text + '\n'
+				page.close()  # Release parsed page objects
+
+	def _iter_docx(self, chunk_size):
+		doc = docx.Document(self.path)
+		for p in doc.paragraphs:
+			yield p.text + '\n'
 	
 	# ======================================================================
 	# PUBLIC METHODS
@@ -116,6 +137,19 @@ class File:
 			return reader()
 		return None
 		
+	# Read file content incrementally as text chunks (pages, paragraphs, blocks)
+	# ----------------------------------------------------------------------
+	def read_chunks(self, chunk_size=1 << 20):
+		readers = {
+			'html' : self._iter_html,
+			'htm'  : self._iter_html,
+			'pdf'  : self._iter_pdf,
+			'docx' : self._iter_docx
+		}
+		if File.exists(self.path):
+			reader = readers.get(self.extension, self._iter_txt)
+			yield from reader(chunk_size)
+
 	# Write content to file
 	# ----------------------------------------------------------------------
 	def write(self, content, encoding='utf-8', mode='w'):
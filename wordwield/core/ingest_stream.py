@@ -0,0 +1,127 @@
+# ======================================================================
+# Streaming ingestion: sentences → fixed-size batches → encoded chunks,
+# as background stages connected by bounded queues.
+# ======================================================================
+
+import queue
+import threading
+
+
+_END = object()  # End of stream marker
+
+
+class IngestStream:
+	def __init__(self, sentences, encoder, batch_size=256, queue_size=4, window_pooling='length'):
+		self.sentences      = sentences                         # Iterable of sentences (may be lazy)
+		self.encoder        = encoder                           # Encoder or EncoderPool
+		self.batch_size     = batch_size                        # Sentences per encoded chunk
+		self.window_pooling = window_pooling
+		self.batches        = queue.Queue(maxsize=queue_size)   # Sentence batches waiting for encoder
+		self.chunks         = queue.Queue(maxsize=queue_size)   # Encoded chunks waiting for consumer
+		self.stopped        = threading.Event()
+		self.error          = None
+		self.threads        = [
+			threading.Thread(target=self._run_batcher, daemon=True),
+			threading.Thread(target=self._run_encoder, daemon=True)
+		]
+
+	# ======================================================================
+	# PRIVATE METHODS
+	# ======================================================================
+
+	# Put item, giving up when stream is stopped (consumer gone)
+	# ----------------------------------------------------------------------
+	def _put(self, target, item):
+		while not self.stopped.is_set():
+			try:
+				target.put(item, timeout=0.1)
+				break
+			except queue.Full:
+				pass
+
+	# Get item, ending early when stream is stopped or a stage failed
+	# ----------------------------------------------------------------------
+	def _get(self, source):
+		item = None
+		while item is None:
+			try:
+				item = source.get(timeout=0.1)
+			except queue.Empty:
+				if self.stopped.is_set() or self.error is not None:
+					item = _END
+		return item
+
+	# Stage 1: read sentences lazily, cut into batches
+	# ----------------------------------------------------------------------
+	def _run_batcher(self):
+		try:
+			batch = []
+			for sentence in self.sentences:
+				if self.stopped.is_set():
+					break
+				batch.append(sentence)
+				if len(batch) == self.batch_size:
+					self._put(self.batches, batch)
+					batch = []
+
+			if batch:
+				self._put(self.batches, batch)
+
+		except Exception as e:
+			self.error = e
+
+		finally:
+			self._put(self.batches, _END)
+
+	# Stage 2: encode batches, carrying context recurrence across them
+	# ----------------------------------------------------------------------
+	def _run_encoder(self):
+		try:
+			ap_prev = None
+			while (batch := self._get(self.batches)) is not _END:
+				if self.error is None:
+					vectors = self.encoder.encode_sequence_batch(
+						batch,
+						ap_prev        = ap_prev,
+						window_pooling = self.window_pooling
+					)
+					ap_prev = vectors[-1]
+					self._put(self.chunks, (batch, vectors))
+
+		except Exception as e:
+			self.error = e
+			self.stopped.set()
+
+		finally:
+			self._put(self.chunks, _END)
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Yield (offset, texts, vectors) chunks in document order
+	# ----------------------------------------------------------------------
+	def __iter__(self):
+		for thread in self.threads:
+			thread.start()
+
+		try:
+			offset = 0
+			while self.error is None and (chunk := self._get(self.chunks)) is not _END:
+				texts, vectors = chunk
+				yield offset, texts, vectors
+				offset += len(texts)
+
+			if self.error is not None:
+				raise self.error
+
+		finally:
+			self.close()
+
+	# Stop background stages
+	# ----------------------------------------------------------------------
+	def close(self):
+		self.stopped.set()
+		for thread in self.threads:
+			if thread.is_alive():
+				thread.join()
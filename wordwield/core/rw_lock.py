@@ -0,0 +1,63 @@
+# ======================================================================
+# Reader/writer lock with single updater: readers share, the updater
+# runs alongside readers (e.g. rebuilding a copy), writers are exclusive.
+# Writer-preferring, not re-entrant.
+# ======================================================================
+
+import threading
+from contextlib import contextmanager
+
+
+class RwLock:
+	def __init__(self):
+		self.cond    = threading.Condition()
+		self.updater = threading.Lock()  # One mutating thread at a time
+		self.readers = 0                 # Active readers
+		self.writing = False             # Exclusive section active
+		self.waiting = 0                 # Writers waiting: new readers hold back
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Shared section: concurrent with other readers and the updater
+	# ----------------------------------------------------------------------
+	@contextmanager
+	def read(self):
+		with self.cond:
+			while self.writing or self.waiting:
+				self.cond.wait()
+			self.readers += 1
+
+		try:
+			yield
+		finally:
+			with self.cond:
+				self.readers -= 1
+				if not self.readers:
+					self.cond.notify_all()
+
+	# Update section: excludes other updaters, readers keep running
+	# ----------------------------------------------------------------------
+	@contextmanager
+	def update(self):
+		with self.updater:
+			yield
+
+	# Exclusive section: waits for readers to drain (taken inside update)
+	# ----------------------------------------------------------------------
+	@contextmanager
+	def write(self):
+		with self.cond:
+			self.waiting += 1
+			while self.writing or self.readers:
+				self.cond.wait()
+			self.waiting -= 1
+			self.writing  = True
+
+		try:
+			yield
+		finally:
+			with self.cond:
+				self.writing = False
+				self.cond.notify_all()
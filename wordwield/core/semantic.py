@@ -5,7 +5,7 @@ class Semantic:
 	def __init__(self, text, sentencize=True):
 		self.encoder     = ww.encoder
 		self.sentencizer = Sentencizer()
-		self.dim         = self.encoder.model.config.hidden_size
+		self.dim         = self.encoder.dim
 
 		if sentencize:
 			self.texts   = self.sentencizer.to_sentences(text)
@@ -6,6 +6,8 @@ import pysbd
 from langdetect import detect, DetectorFactory
 from tqdm import tqdm
 
+from wordwield.core.sentencizers.text_stream import iter_lines, get_lines, test_sentences, LINES_SAMPLE
+
 DetectorFactory.seed = 0
 
 
@@ -18,30 +20,60 @@ class PysbdSentencizer:
 			'mr', 'nl', 'da', 'en', 'ru', 'sk', 'hi', 'ur', 'bg', 'es', 'my', 'el'
 		}
 
-	# Convert text to sentences
+	# Build segmenter for language detected from text sample
 	#--------------------------------------------------
-	def to_sentences(self, text):
-		lines = [line.strip() for line in text.splitlines() if line.strip()]
-
+	def _get_segmenter(self, text):
 		try    : lang = detect(text)
 		except : lang = 'en'
 
 		if lang not in self.supported:
 			lang = 'en'
 
-		segmenter = pysbd.Segmenter(language=lang, clean=False)
+		return pysbd.Segmenter(language=lang, clean=False)
 
-		chunk_size = 200_000
-		parts      = []
-		for line in lines:
-			parts.extend([line[i:i + chunk_size] for i in range(0, len(line), chunk_size)])
-
-		sents = []
+	# Segment line parts into stripped non-empty sentences
+	#--------------------------------------------------
+	def _segment(self, parts, segmenter):
 		for part in parts:
-			out = segmenter.segment(part)
-			for st in out:
+			for st in segmenter.segment(part):
 				strip = st.strip()
 				if strip:
-					sents.append(strip)
+					yield strip
+
+	# Convert text to sentences
+	#--------------------------------------------------
+	def to_sentences(self, text):
+		segmenter = self._get_segmenter(text)
+		return list(self._segment(iter_lines(text), segmenter))
+
+	# Convert text chunks to sentences lazily (language detected on first detect_chars)
+	#--------------------------------------------------
+	def to_sentences_stream(self, chunks, detect_chars=10_000):
+		segmenter = None
+		head      = []  # Lines read before language is known
+		head_size = 0
 
-		return sents
+		for line in iter_lines(chunks):
+			if segmenter is None:
+				head.append(line)
+				head_size += len(line)
+				if head_size >= detect_chars:
+					segmenter = self._get_segmenter('\n'.join(head))
+					yield from self._segment(head, segmenter)
+					head = []
+			else:
+				yield from self._segment([line], segmenter)
+
+		if segmenter is None and head:
+			segmenter = self._get_segmenter('\n'.join(head))
+			yield from self._segment(head, segmenter)
+
+	#==================================================
+	# TEST METHODS
+	#==================================================
+
+	# Test sentences against baseline: segmented text.splitlines() lines
+	#--------------------------------------------------
+	def test_lines(self, text=LINES_SAMPLE):
+		expected = list(self._segment(get_lines(text), self._get_segmenter(text)))
+		return test_sentences(self, expected, text)
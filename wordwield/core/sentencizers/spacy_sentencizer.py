@@ -5,6 +5,8 @@
 from spacy.lang.en import English
 from tqdm          import tqdm
 
+from wordwield.core.sentencizers.text_stream import iter_lines, get_lines, test_sentences, LINES_SAMPLE
+
 
 class SpacySentencizer:
 	# Initialize spaCy pipeline
@@ -17,18 +19,27 @@ class SpacySentencizer:
 	# Convert text to sentences
 	#--------------------------------------------------
 	def to_sentences(self, text):
-		lines = [line.strip() for line in text.splitlines() if line.strip()]
-
-		chunk_size = 200_000
-		parts      = []
-		for line in lines:
-			parts.extend([line[i:i + chunk_size] for i in range(0, len(line), chunk_size)])
+		return list(self.to_sentences_stream(text))
 
-		sents = []
-		for doc in self.nlp.pipe(parts, batch_size=32):
+	# Convert text chunks to sentences lazily
+	#--------------------------------------------------
+	def to_sentences_stream(self, chunks):
+		for doc in self.nlp.pipe(iter_lines(chunks), batch_size=32):
 			for sent in doc.sents:
 				st = sent.text.strip()
 				if st:
-					sents.append(st)
+					yield st
 
-		return sents
+	#==================================================
+	# TEST METHODS
+	#==================================================
+
+	# Test sentences against baseline: text.splitlines() lines through pipeline
+	#--------------------------------------------------
+	def test_lines(self, text=LINES_SAMPLE):
+		expected = [
+			sent.text.strip()
+			for doc in self.nlp.pipe(get_lines(text), batch_size=32)
+			for sent in doc.sents if sent.text.strip()
+		]
+		return test_sentences(self, expected, text)
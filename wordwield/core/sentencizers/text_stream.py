@@ -0,0 +1,98 @@
+#==================================================
+# Incremental text reading helpers for sentencizers.
+#==================================================
+
+# Line breaks str.splitlines() splits on, sample for sentencizer checks
+LINES_SAMPLE = (
+	'Mac line. Ends here.\rNext line.\x0cPage two starts. It goes on.\x0bVertical tab.'
+	'\x1cFile sep.\x1dGroup sep.\x1eRecord sep.\x85Next line char.\u2028Line sep.'
+	'\u2029Paragraph sep.\r\nWindows line.\n\nLast line.'
+)
+
+
+# Yield stripped non-empty lines from text or iterable of text chunks,
+# split like str.splitlines() (\r, \x0c, \u2028... not only \n)
+#--------------------------------------------------
+def iter_lines(chunks, chunk_size=200_000):
+	if isinstance(chunks, str):
+		chunks = [chunks]
+
+	tail = ''
+	for chunk in chunks:
+		lines = (tail + chunk).splitlines(keepends=True)
+		tail  = lines.pop() if lines and _is_open(lines[-1]) else ''  # Incomplete last line, wait for next chunk
+
+		for line in lines:
+			yield from _split_line(line, chunk_size)
+
+		if len(tail) > chunk_size:        # Overlong line, flush complete parts
+			cut  = len(tail) - len(tail) % chunk_size
+			yield from _split_line(tail[:cut], chunk_size)
+			tail = tail[cut:]
+
+	yield from _split_line(tail, chunk_size)
+
+
+# Line without line terminator (\r\n split across chunks leaves empty line, skipped)
+#--------------------------------------------------
+def _is_open(line):
+	return line.splitlines() == [line]
+
+
+# Strip line and cut into parts of at most chunk_size characters
+#--------------------------------------------------
+def _split_line(line, chunk_size):
+	line = line.strip()
+	for i in range(0, len(line), chunk_size):
+		yield line[i:i + chunk_size]
+
+
+# Lines as baseline sentencizers read them: text.splitlines(), stripped,
+# non-empty, cut into chunk_size parts
+#--------------------------------------------------
+def get_lines(text, chunk_size=200_000):
+	return [part for line in text.splitlines() for part in _split_line(line, chunk_size)]
+
+
+# Test iter_lines against get_lines on whole text and on chunks of every size
+#--------------------------------------------------
+def test_iter_lines(text=LINES_SAMPLE, chunk_sizes=(1, 2, 3, 7, 64)):
+	expected = get_lines(text)
+	failed   = []
+
+	print(f'\n=== iter_lines vs splitlines: {len(expected)} lines ===')
+
+	for size in (None, *chunk_sizes):
+		chunks = text if size is None else [text[i:i + size] for i in range(0, len(text), size)]
+		if list(iter_lines(chunks)) != expected:
+			failed.append(size or 'text')
+
+	if failed:
+		raise AssertionError(f'iter_lines differs from splitlines for chunk sizes {failed}')
+
+	print('✓ iter_lines matches splitlines')
+	return expected
+
+
+# Test sentencizer to_sentences (whole text) and to_sentences_stream (text
+# in chunk_size chunks) against expected baseline sentences
+#--------------------------------------------------
+def test_sentences(sentencizer, expected, text=LINES_SAMPLE, chunk_size=3):
+	name   = type(sentencizer).__name__
+	chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+	got    = {
+		'to_sentences'        : sentencizer.to_sentences(text),
+		'to_sentences_stream' : list(sentencizer.to_sentences_stream(chunks))
+	}
+
+	print(f'\n=== {name} vs splitlines baseline: {len(expected)} sentences ===')
+
+	failed = [method for method, sentences in got.items() if sentences != expected]
+	for method in failed:
+		print(f'{method}: {got[method]}')
+
+	if failed:
+		raise AssertionError(f'{name} differs from baseline in {failed}')
+
+	print(f'✓ {name} matches baseline')
+	return expected
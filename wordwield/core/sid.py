@@ -74,11 +74,17 @@ class Sid:
 	# Ids are sequential, get document id range
 	# ------------------------------------------------------------------
 	@staticmethod
-	def get_document_id_range(document_id):
-		min = document_id << _SHIFT_DOC
-		max = ((document_id + 1) << _SHIFT_DOC) - 1
+	def get_document_id_range(document_id, domain_id=0):
+		min = Sid(domain_id=domain_id, document_id=document_id).id
+		max = min + (1 << _SHIFT_DOC) - 1
 		return min, max
 
+	# Document components of array of Sid ints (vectorized)
+	# ------------------------------------------------------------------
+	@staticmethod
+	def get_document_ids(ids):
+		return (ids >> _SHIFT_DOC) & _MASK
+
 	# Ids are sequential, get domain id range
 	# ------------------------------------------------------------------
 	@staticmethod
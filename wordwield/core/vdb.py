@@ -3,21 +3,66 @@
 # ======================================================================
 
 import os
+import json
+import math
+import time
+import queue
+import asyncio
+import threading
+from collections        import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 os.environ.setdefault('KMP_DUPLICATE_LIB_OK', 'TRUE')
 os.environ.setdefault('OMP_NUM_THREADS', '1')
 
 import faiss
+import torch
 import numpy as np
 
-from wordwield.core.norm import Norm
-from wordwield.core.sid  import Sid
+from wordwield.core.norm    import Norm
+from wordwield.core.sid     import Sid
+from wordwield.core.rw_lock import RwLock
 
 
 class Vdb:
-	def __init__(self, dim):
-		self.dim         = dim # encoder.model.config.hidden_size
-		self.indexes     = {}  # domain_id → FAISS index
+	# Domain index defaults: every domain starts as plain flat and is rebuilt
+	# with configured `index` kind and `compression` once it holds `promote_at`
+	# vectors (enough to train centroids / quantizers)
+	DEFAULT_CONFIG = {
+		'index'           : 'flat',  # 'flat' | 'hnsw' | 'ivf'
+		'compression'     : None,    # None | 'sq8' | 'fp16' | 'pq'
+		'promote_at'      : 20_000,  # Vectors before flat is promoted
+		'hnsw_m'          : 32,      # HNSW neighbours per node
+		'ef_construction' : 80,      # HNSW build beam
+		'ef_search'       : 64,      # HNSW query beam (per query override)
+		'ivf_lists'       : None,    # IVF centroids, None → 4·√n
+		'nprobe'          : 16,      # IVF lists probed (per query override)
+		'pq_m'            : None,    # PQ sub-quantizers (divides dim), None → dim / 8
+		'compact_at'      : 0.2      # Tombstoned vector ratio triggering background compaction
+	}
+
+	SQ_TYPES = {
+		'sq8'  : faiss.ScalarQuantizer.QT_8bit,
+		'fp16' : faiss.ScalarQuantizer.QT_fp16
+	}
+
+	def __init__(self, dim, path=None, config=None):
+		self.dim           = dim            # encoder.model.config.hidden_size
+		self.path          = path           # Snapshot directory, None → no snapshots
+		self.config        = {**self.DEFAULT_CONFIG, **(config or {})}  # Defaults for unconfigured domains
+		self.indexes       = {}             # domain_id → FAISS index
+		self.configs       = {}             # domain_id → index config
+		self.versions      = {}             # domain_id → domain version of last snapshot
+		self.locks         = {}             # domain_id → RwLock (queries read, add/remove write)
+		self.tombstones    = {}             # domain_id → removed document ids still in index
+		self.dead          = {}             # domain_id → number of tombstoned vectors
+		self.compacting    = queue.Queue()  # Domains due for background compaction
+		self.compactor     = None           # Background compaction thread
+		self.error         = None           # Last background compaction error
+		self.lock          = threading.Lock()  # Guards dicts above and selector cache
+		self.decoding      = threading.Lock()  # IVF direct map is switched while decoding
+		self.selectors     = OrderedDict()  # (domain_id, document_ids) → FAISS ID selector, LRU
+		self.max_selectors = 256
 		faiss.omp_set_num_threads(1)
 
 	# ======================================================================
@@ -27,11 +72,346 @@ class Vdb:
 	# Get (or create) FAISS index for a domain
 	# ----------------------------------------------------------------------
 	def _get_domain_index(self, domain_id):
-		if domain_id not in self.indexes:
-			self.indexes[domain_id] = faiss.IndexIDMap(
-				faiss.IndexFlatIP(self.dim)
-			)
-		return self.indexes[domain_id]
+		with self.lock:
+			if domain_id not in self.indexes:
+				self.indexes[domain_id] = faiss.IndexIDMap(
+					faiss.IndexFlatIP(self.dim)
+				)
+			return self.indexes[domain_id]
+
+	# Get (or create) reader/writer lock of a domain
+	# ----------------------------------------------------------------------
+	def _get_lock(self, domain_id):
+		with self.lock:
+			return self.locks.setdefault(domain_id, RwLock())
+
+	# Get layout of FAISS index: (kind, compression)
+	# ----------------------------------------------------------------------
+	def _get_layout(self, faiss_index):
+		kind  = 'flat'
+		codes = faiss_index
+
+		if isinstance(faiss_index, faiss.IndexIVF):
+			kind = 'ivf'
+		else:
+			codes = faiss.downcast_index(faiss_index.index)
+			if isinstance(codes, faiss.IndexHNSW):
+				kind  = 'hnsw'
+				codes = faiss.downcast_index(codes.storage)
+
+		compression = None
+		if isinstance(codes, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+			compression = {qtype: name for name, qtype in self.SQ_TYPES.items()}.get(codes.sq.qtype)
+		elif isinstance(codes, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+			compression = 'pq'
+
+		return kind, compression
+
+	# Get layout domain index should have at given size
+	# ----------------------------------------------------------------------
+	def _get_target_layout(self, config, size):
+		promote_at = max(config['promote_at'], 1)
+		if config['compression'] == 'pq':
+			promote_at = max(promote_at, 256)  # PQ needs ≥ 256 training vectors per codebook
+
+		layout = ('flat', None)
+		if size >= promote_at:
+			layout = (config['index'], config['compression'])
+
+		return layout
+
+	# Get PQ sub-quantizer count dividing dim
+	# ----------------------------------------------------------------------
+	def _get_pq_m(self, config):
+		m = config['pq_m'] or max(1, self.dim // 8)
+		while self.dim % m:
+			m -= 1
+		return m
+
+	# Build FAISS index of given layout from (normalized) vectors
+	# ----------------------------------------------------------------------
+	def _build_index(self, layout, config, ids, vectors):
+		kind, compression = layout
+		metric            = faiss.METRIC_INNER_PRODUCT
+		sq_type           = self.SQ_TYPES.get(compression)
+
+		if compression not in (None, 'pq', *self.SQ_TYPES):
+			raise ValueError(f'Unknown compression `{compression}`')
+
+		if kind == 'flat':
+			if   compression is None : codes = faiss.IndexFlatIP(self.dim)
+			elif compression == 'pq' : codes = faiss.IndexPQ(self.dim, self._get_pq_m(config), 8, metric)
+			else                     : codes = faiss.IndexScalarQuantizer(self.dim, sq_type, metric)
+			faiss_index = faiss.IndexIDMap(codes)
+
+		elif kind == 'hnsw':
+			M = config['hnsw_m']
+			if   compression is None : hnsw = faiss.IndexHNSWFlat(self.dim, M, metric)
+			elif compression == 'pq' : hnsw = faiss.IndexHNSWPQ(self.dim, self._get_pq_m(config), M, 8, metric)
+			else                     : hnsw = faiss.IndexHNSWSQ(self.dim, sq_type, M, metric)
+			hnsw.hnsw.efConstruction = config['ef_construction']
+			faiss_index = faiss.IndexIDMap(hnsw)
+
+		elif kind == 'ivf':
+			lists     = config['ivf_lists'] or int(4 * math.sqrt(len(vectors)))
+			lists     = max(1, min(lists, len(vectors) // 39))  # FAISS wants ≥ 39 training points per list
+			quantizer = faiss.IndexFlatIP(self.dim)
+			if   compression is None : faiss_index = faiss.IndexIVFFlat(quantizer, self.dim, lists, metric)
+			elif compression == 'pq' : faiss_index = faiss.IndexIVFPQ(quantizer, self.dim, lists, self._get_pq_m(config), 8, metric)
+			else                     : faiss_index = faiss.IndexIVFScalarQuantizer(quantizer, self.dim, lists, sq_type, metric)
+
+		else:
+			raise ValueError(f'Unknown index kind `{kind}`')
+
+		if not faiss_index.is_trained:
+			faiss_index.train(vectors)  # Centroids / quantizers from stored atom vectors
+
+		if len(vectors):
+			faiss_index.add_with_ids(vectors, ids)
+
+		return faiss_index
+
+	# Get ids stored in domain index
+	# ----------------------------------------------------------------------
+	def _get_ids(self, domain_id):
+		faiss_index = self._get_domain_index(domain_id)
+
+		if isinstance(faiss_index, faiss.IndexIVF):
+			invlists = faiss_index.invlists
+			ids      = [
+				faiss.rev_swig_ptr(invlists.get_ids(n), invlists.list_size(n)).copy()
+				for n in range(faiss_index.nlist) if invlists.list_size(n)
+			]
+			ids = np.concatenate(ids) if ids else np.zeros(0, dtype='int64')
+		else:
+			ids = faiss.vector_to_array(faiss_index.id_map).copy()
+
+		return ids
+
+	# Get (ids, vectors) stored in domain index (decoded when compressed),
+	# optionally restricted to documents
+	# ----------------------------------------------------------------------
+	def _get_vectors(self, domain_id, document_ids=None):
+		faiss_index = self._get_domain_index(domain_id)
+		ids         = self._get_ids(domain_id)
+		positions   = np.arange(len(ids))
+
+		if document_ids is not None:
+			positions = np.flatnonzero(np.isin(Sid.get_document_ids(ids), list(document_ids)))
+			ids       = ids[positions]
+
+		if not len(ids):
+			vectors = np.zeros((0, self.dim), dtype='float32')
+		elif isinstance(faiss_index, faiss.IndexIVF):
+			with self.decoding:
+				faiss_index.set_direct_map_type(faiss.DirectMap.Hashtable)
+				vectors = faiss_index.reconstruct_batch(ids)
+				faiss_index.set_direct_map_type(faiss.DirectMap.NoMap)
+		elif document_ids is None:
+			vectors = faiss_index.index.reconstruct_n(0, faiss_index.ntotal)
+		else:
+			vectors = faiss_index.index.reconstruct_batch(positions)
+
+		return ids, vectors
+
+	# Get cached ID selector restricting search to live documents,
+	# None → whole domain without tombstones (no filter needed)
+	# ----------------------------------------------------------------------
+	def _get_selector(self, domain_id, document_ids=None):
+		tombstones = self.tombstones.get(domain_id, set())
+
+		if document_ids is None and not tombstones:
+			return None
+
+		key = (domain_id, tuple(sorted(set(document_ids))) if document_ids is not None else None)
+
+		with self.lock:
+			selector = self.selectors.get(key)
+			if selector is not None:
+				self.selectors.move_to_end(key)
+
+		if selector is None:
+			ids = None
+			if document_ids is None:
+				ids      = self._get_ids(domain_id)
+				ids      = ids[np.isin(Sid.get_document_ids(ids), list(tombstones))]
+				selector = faiss.IDSelectorNot(faiss.IDSelectorBatch(ids))  # Keeps reference to inner selector
+			elif len(key[1]) == 1 and key[1][0] not in tombstones:
+				id_min, id_max = Sid.get_document_id_range(key[1][0], domain_id)
+				selector       = faiss.IDSelectorRange(id_min, id_max + 1)  # [min, max)
+			else:
+				ids      = self._get_ids(domain_id)
+				ids      = ids[np.isin(Sid.get_document_ids(ids), list(set(key[1]) - tombstones))]
+				selector = faiss.IDSelectorBatch(ids)
+
+			with self.lock:
+				self.selectors[key] = selector
+				while len(self.selectors) > self.max_selectors:
+					self.selectors.popitem(last=False)
+
+		return selector
+
+	# Live documents among document_ids (tombstoned ones dropped)
+	# ----------------------------------------------------------------------
+	def _get_live_documents(self, domain_id, document_ids):
+		return set(document_ids) - self.tombstones.get(domain_id, set())
+
+	# Drop cached selectors of domain (batch selectors mirror index content)
+	# ----------------------------------------------------------------------
+	def _drop_selectors(self, domain_id):
+		with self.lock:
+			for key in [key for key in self.selectors if key[0] == domain_id]:
+				del self.selectors[key]
+
+	# Exact search of query matrix over decoded vectors of selected documents
+	# ----------------------------------------------------------------------
+	def _query_subset(self, domain_id, query_matrix, k, document_ids):
+		ids, vectors = self._get_vectors(domain_id, document_ids)
+		scores       = query_matrix @ vectors.T
+		top          = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+		return np.take_along_axis(scores, top, axis=1), ids[top]
+
+	# Search domain with normalized query matrix, returns (scores, ids)
+	# of shape (n, k), ids padded with -1
+	# ----------------------------------------------------------------------
+	def _search(self, domain_id, query_matrix, k, document_ids=None, nprobe=None, ef_search=None):
+		faiss_index = self._get_domain_index(domain_id)
+		layout      = self._get_layout(faiss_index)
+		selector    = self._get_selector(domain_id, document_ids)
+
+		if selector is None:
+			params      = self._get_search_params(domain_id, nprobe, ef_search)
+			scores, ids = faiss_index.search(query_matrix, k, params=params)
+
+		elif layout == ('flat', 'pq') and document_ids is not None:  # IndexPQ has no selector support
+			scores, ids = self._query_subset(domain_id, query_matrix, k, self._get_live_documents(domain_id, document_ids))
+
+		elif layout == ('flat', 'pq'):  # Over-fetch past tombstoned vectors, then drop them
+			fetch       = min(k + self.dead.get(domain_id, 0), faiss_index.ntotal)
+			scores, ids = faiss_index.search(query_matrix, fetch)
+			dead        = np.isin(Sid.get_document_ids(ids), list(self.tombstones[domain_id])) | (ids < 0)
+			order       = np.argsort(dead, axis=1, kind='stable')[:, :k]  # Live hits first, rank kept
+			scores      = np.take_along_axis(scores, order, axis=1)
+			ids         = np.where(np.take_along_axis(dead, order, axis=1), -1, np.take_along_axis(ids, order, axis=1))
+
+		else:
+			params      = self._get_search_params(domain_id, nprobe, ef_search, selector)
+			scores, ids = faiss_index.search(query_matrix, k, params=params)
+
+			# ANN may miss filtered hits (HNSW graph cut, unprobed IVF lists): exact over subset
+			if document_ids is not None and layout[0] != 'flat' and (ids < 0).any():
+				scores, ids = self._query_subset(domain_id, query_matrix, k, self._get_live_documents(domain_id, document_ids))
+
+		return scores, ids
+
+	# Normalize query vector or matrix to float32 (n, dim) on unit sphere
+	# ----------------------------------------------------------------------
+	def _to_query_matrix(self, query_matrix):
+		query_matrix = torch.as_tensor(np.asarray(query_matrix, dtype='float32')).reshape(-1, self.dim)
+		return Norm.to_sphere(query_matrix).cpu().numpy().astype('float32')
+
+	# Rebuild domain index with given layout (caller holds update lock):
+	# queries keep using old index while new one is built, then it is swapped in
+	# ----------------------------------------------------------------------
+	def _rebuild(self, domain_id, layout):
+		tombstones   = set(self.tombstones.get(domain_id, ()))
+		ids, vectors = self._get_vectors(domain_id)
+		live         = ~np.isin(Sid.get_document_ids(ids), list(tombstones))  # Tombstoned vectors dropped
+		faiss_index  = self._build_index(layout, self.get_config(domain_id), ids[live], vectors[live])
+
+		with self._get_lock(domain_id).write():
+			self.indexes[domain_id] = faiss_index
+			self._clear_tombstones(domain_id, tombstones)
+
+	# Forget tombstones whose vectors left the index (caller holds write lock)
+	# ----------------------------------------------------------------------
+	def _clear_tombstones(self, domain_id, tombstones):
+		if tombstones:
+			self.tombstones[domain_id] -= tombstones
+			self.dead[domain_id]        = 0
+		self._drop_selectors(domain_id)
+
+	# Physically remove tombstoned vectors (caller holds update lock).
+	# HNSW graph has no removal → rebuild; others: remove ids from a copy,
+	# so queries keep running on the old index until swap
+	# ----------------------------------------------------------------------
+	def _compact(self, domain_id):
+		tombstones  = set(self.tombstones.get(domain_id, ()))
+		faiss_index = self.indexes.get(domain_id)
+
+		if tombstones and faiss_index is not None:
+			layout = self._get_layout(faiss_index)
+
+			if layout[0] == 'hnsw':
+				self._rebuild(domain_id, layout)
+			else:
+				ids       = self._get_ids(domain_id)
+				ids       = ids[np.isin(Sid.get_document_ids(ids), list(tombstones))]
+				compacted = faiss.clone_index(faiss_index)
+				compacted.remove_ids(faiss.IDSelectorBatch(ids))
+
+				with self._get_lock(domain_id).write():
+					self.indexes[domain_id] = compacted
+					self._clear_tombstones(domain_id, tombstones)
+
+	# Queue domain for background compaction once tombstone ratio is reached
+	# ----------------------------------------------------------------------
+	def _compact_if_due(self, domain_id):
+		faiss_index = self.indexes.get(domain_id)
+		dead        = self.dead.get(domain_id, 0)
+
+		if faiss_index is not None and dead and dead >= self.get_config(domain_id)['compact_at'] * faiss_index.ntotal:
+			with self.lock:
+				if self.compactor is None:
+					self.compactor = threading.Thread(target=self._run_compactor, daemon=True)
+					self.compactor.start()
+			self.compacting.put(domain_id)
+
+	# Background compactor: compact queued domains one by one
+	# ----------------------------------------------------------------------
+	def _run_compactor(self):
+		while True:
+			domain_id = self.compacting.get()
+			try:
+				with self._get_lock(domain_id).update():
+					self._compact(domain_id)
+			except Exception as e:
+				self.error = e
+
+	# Promote plain flat domain index to configured layout once it is large enough
+	# ----------------------------------------------------------------------
+	def _promote_if_due(self, domain_id):
+		faiss_index = self._get_domain_index(domain_id)
+		layout      = self._get_layout(faiss_index)
+		target      = self._get_target_layout(self.get_config(domain_id), faiss_index.ntotal)
+
+		if layout == ('flat', None) and target != layout:
+			self._rebuild(domain_id, target)
+
+	# Get per-query search parameters for domain index
+	# ----------------------------------------------------------------------
+	def _get_search_params(self, domain_id, nprobe=None, ef_search=None, selector=None):
+		config = self.get_config(domain_id)
+		kind   = self._get_layout(self._get_domain_index(domain_id))[0]
+		params = None
+
+		if kind == 'ivf':
+			params = faiss.SearchParametersIVF(nprobe=nprobe or config['nprobe'])
+		elif kind == 'hnsw':
+			params = faiss.SearchParametersHNSW(efSearch=ef_search or config['ef_search'])
+		elif selector is not None:
+			params = faiss.SearchParameters()
+
+		if selector is not None:
+			params.sel = selector
+
+		return params
+
+	# Get snapshot index and meta file paths for a domain
+	# ----------------------------------------------------------------------
+	def _get_snapshot_paths(self, domain_id):
+		base = os.path.join(self.path, f'domain_{domain_id}')
+		return f'{base}.faiss', f'{base}.json'
 
 	# ======================================================================
 	# PUBLIC METHODS
@@ -42,46 +422,333 @@ class Vdb:
 	def add(self, domain_id, vector_ids, vector_values):
 		assert len(vector_ids) == len(vector_values)
 
-		faiss_index = self._get_domain_index(domain_id)
-		faiss_vecs  = Norm.to_sphere(vector_values).cpu().numpy().astype('float32')
+		lock       = self._get_lock(domain_id)
+		vector_ids = np.array(vector_ids, dtype='int64')
+		faiss_vecs = Norm.to_sphere(vector_values).cpu().numpy().astype('float32')
+
+		with lock.update():
+			# Re-added document must not collide with its own tombstoned vectors
+			if self.tombstones.get(domain_id, set()) & set(Sid.get_document_ids(vector_ids).tolist()):
+				self._compact(domain_id)
 
-		faiss_index.add_with_ids(faiss_vecs, np.array(vector_ids, dtype='int64'))
+			with lock.write():
+				self._get_domain_index(domain_id).add_with_ids(faiss_vecs, vector_ids)
+				self._drop_selectors(domain_id)
+			self._promote_if_due(domain_id)
 
-	# Remove all vectors belonging to a document (encoded in vector_id)
+	# Remove domain index, or tombstone document: queries skip it at once,
+	# its vectors leave the index on next (background) compaction
 	# ----------------------------------------------------------------------
 	def remove(self, domain_id, document_id=None):
-		faiss_index = self._get_domain_index(domain_id)
+		lock = self._get_lock(domain_id)
 
-		if document_id is None:
-			self.vdb.indexes.pop(domain_id, None)
-		else:
-			id_min, id_max = Sid.get_document_id_range(document_id)
-			selector = faiss.IDSelectorRange(id_min, id_max)
+		with lock.update():
+			if document_id is None:
+				with lock.write():
+					with self.lock:
+						self.indexes.pop(domain_id, None)
+						self.configs.pop(domain_id, None)
+					self.tombstones.pop(domain_id, None)
+					self.dead.pop(domain_id, None)
+					self._drop_selectors(domain_id)
+				self.drop_snapshot(domain_id)
+
+			elif document_id not in self.tombstones.get(domain_id, set()):
+				id_min, id_max = Sid.get_document_id_range(document_id, domain_id)
+				ids            = self._get_ids(domain_id)
+				count          = int(((ids >= id_min) & (ids <= id_max)).sum())
+
+				if count:
+					with lock.write():
+						self.tombstones.setdefault(domain_id, set()).add(document_id)
+						self.dead[domain_id] = self.dead.get(domain_id, 0) + count
+						self._drop_selectors(domain_id)
+
+		self._compact_if_due(domain_id)
+
+	# Physically remove tombstoned vectors of domain now
+	# ----------------------------------------------------------------------
+	def compact(self, domain_id):
+		with self._get_lock(domain_id).update():
+			self._compact(domain_id)
+
+	# Get domain index config (defaults when not configured)
+	# ----------------------------------------------------------------------
+	def get_config(self, domain_id):
+		return self.configs.get(domain_id, self.config)
+
+	# Configure domain index, rebuilding it when kind changes
+	# ----------------------------------------------------------------------
+	def set_config(self, domain_id, config=None):
+		config = {**self.config, **(config or {})}
+
+		if config['index'] not in ('flat', 'hnsw', 'ivf'):
+			raise ValueError(f'Unknown index kind `{config["index"]}`')
+
+		if config['compression'] not in (None, 'pq', *self.SQ_TYPES):
+			raise ValueError(f'Unknown compression `{config["compression"]}`')
+
+		with self._get_lock(domain_id).update():
+			self.configs[domain_id] = config
+
+			if domain_id in self.indexes:
+				faiss_index = self.indexes[domain_id]
+				target      = self._get_target_layout(config, faiss_index.ntotal)
+
+				if self._get_layout(faiss_index) != target:
+					self._rebuild(domain_id, target)
 
-		faiss_index.remove_ids(selector)
+		return config
 
-	# Query vectors by vector, optionally restricted to doc_ids
+	# Number of live vectors in domain index (tombstoned ones excluded)
 	# ----------------------------------------------------------------------
-	def query(self, domain_id, query_vector, k=5, document_ids=None):
-		faiss_index  = self._get_domain_index(domain_id)
-		query_vector = Norm.to_sphere(query_vector).reshape(1, -1)
+	def get_size(self, domain_id):
+		faiss_index = self.indexes.get(domain_id)
+		return faiss_index.ntotal - self.dead.get(domain_id, 0) if faiss_index is not None else 0
+
+	# Domain index layout: (kind, compression)
+	# ----------------------------------------------------------------------
+	def get_layout(self, domain_id):
+		return self._get_layout(self._get_domain_index(domain_id))
+
+	# Domain index stats: layout, size and memory against plain flat float32
+	# ----------------------------------------------------------------------
+	def get_stats(self, domain_id):
+		with self._get_lock(domain_id).read():
+			faiss_index       = self._get_domain_index(domain_id)
+			kind, compression = self._get_layout(faiss_index)
+			memory            = faiss.serialize_index(faiss_index).nbytes
+			memory_flat       = faiss_index.ntotal * (self.dim * 4 + 8)  # float32 vectors + int64 ids
+
+		return {
+			'kind'        : kind,
+			'compression' : compression,
+			'size'        : faiss_index.ntotal,
+			'dead'        : self.dead.get(domain_id, 0),  # Tombstoned, awaiting compaction
+			'memory'      : memory,
+			'memory_flat' : memory_flat,
+			'ratio'       : memory / memory_flat if memory_flat else 1.0,
+			'config'      : self.get_config(domain_id)
+		}
+
+	# Save domain index snapshot tagged with domain version
+	# ----------------------------------------------------------------------
+	def save_snapshot(self, domain_id, version, created=None):
+		if self.path is not None:
+			os.makedirs(self.path, exist_ok=True)
+			index_path, meta_path = self._get_snapshot_paths(domain_id)
+			tmp                   = f'{threading.get_ident()}.tmp'  # Per thread: concurrent saves don't clash
+
+			with self._get_lock(domain_id).read():
+				faiss_index = self._get_domain_index(domain_id)
+				meta        = {
+					'version'    : version,
+					'created'    : created,
+					'layout'     : self._get_layout(faiss_index),
+					'ntotal'     : faiss_index.ntotal,
+					'tombstones' : sorted(self.tombstones.get(domain_id, ())),  # Still in saved index
+					'dead'       : self.dead.get(domain_id, 0)
+				}
+				faiss.write_index(faiss_index, f'{index_path}.{tmp}')
+
+			os.replace(f'{index_path}.{tmp}', index_path)  # Atomic, mapped readers keep old file
+
+			with open(f'{meta_path}.{tmp}', 'w') as f:
+				json.dump(meta, f)
+			os.replace(f'{meta_path}.{tmp}', meta_path)
+
+			self.versions[domain_id] = version
+
+	# Load domain index snapshot (memory-mapped where supported), return meta or None
+	# ----------------------------------------------------------------------
+	def load_snapshot(self, domain_id, mmap=True):
+		meta = None
+
+		if self.path is not None:
+			index_path, meta_path = self._get_snapshot_paths(domain_id)
+
+			if os.path.exists(index_path) and os.path.exists(meta_path):
+				with open(meta_path, 'r') as f:
+					meta = json.load(f)
+
+				mmap        = mmap and meta.get('layout', ('flat', None))[0] == 'flat'  # Mapped IVF lists are read-only
+				flags       = faiss.IO_FLAG_MMAP if mmap else 0
+				lock        = self._get_lock(domain_id)
+				faiss_index = faiss.read_index(index_path, flags)
+
+				with lock.update(), lock.write():
+					self.indexes[domain_id]    = faiss_index
+					self.tombstones[domain_id] = set(meta.get('tombstones', ()))
+					self.dead[domain_id]       = meta.get('dead', 0)
+					self._drop_selectors(domain_id)
+
+				self.versions[domain_id] = meta['version']
+
+		return meta
+
+	# Delete domain snapshot files
+	# ----------------------------------------------------------------------
+	def drop_snapshot(self, domain_id):
+		self.versions.pop(domain_id, None)
+
+		if self.path is not None:
+			for path in self._get_snapshot_paths(domain_id):
+				if os.path.exists(path):
+					os.remove(path)
+
+	# Query domain by vector, optionally restricted to documents;
+	# returns [(sid, similarity)], best first
+	# ----------------------------------------------------------------------
+	def query(self, domain_id, query_vector, k=5, document_ids=None, nprobe=None, ef_search=None):
+		'''
+		document_ids: None → whole domain; otherwise filter is applied inside
+		FAISS (ID selector), so up to k hits come back whatever the selectivity.
+		similarity: inner product of unit vectors (cosine), as scored by the
+		index (approximate for compressed layouts).
+		'''
+		return self.query_many(domain_id, query_vector, k, document_ids, nprobe, ef_search)[0]
+
+	# Query domain with matrix of query vectors in one FAISS search,
+	# returns [(sid, similarity)] per query row
+	# ----------------------------------------------------------------------
+	def query_many(self, domain_id, query_matrix, k=5, document_ids=None, nprobe=None, ef_search=None):
+		query_matrix = self._to_query_matrix(query_matrix)
+
+		with self._get_lock(domain_id).read():
+			scores, ids = self._search(domain_id, query_matrix, k, document_ids, nprobe, ef_search)
+
+		return [
+			[(int(id), float(score)) for id, score in zip(row_ids, row_scores) if id >= 0]
+			for row_ids, row_scores in zip(ids, scores)
+		]
+
+	# All atoms with similarity above threshold, [(sid, similarity)] best first
+	# ----------------------------------------------------------------------
+	def range_search(self, domain_id, query_vector, threshold, document_ids=None, limit=None, nprobe=None, ef_search=None):
+		'''
+		Exact for flat layouts; HNSW/IVF only see the visited graph part /
+		probed lists, so raise ef_search / nprobe for exhaustive ranges.
+		limit: cap on returned hits (None → all).
+		'''
+		query_vector = self._to_query_matrix(query_vector)
+
+		with self._get_lock(domain_id).read():
+			faiss_index    = self._get_domain_index(domain_id)
+			selector       = self._get_selector(domain_id, document_ids)
+			params         = self._get_search_params(domain_id, nprobe, ef_search, selector)
+			_, scores, ids = faiss_index.range_search(query_vector, threshold, params=params)
+
+		order = np.argsort(-scores, kind='stable')[:limit]
+
+		return [(int(ids[n]), float(scores[n])) for n in order]
+
+	# Query several domains in parallel threads (FAISS releases the GIL)
+	# and fuse their rankings into [(domain_id, id, fused score)], best first
+	# ----------------------------------------------------------------------
+	def query_federated(self, domain_ids, query_vector, k=5, fusion='rrf', k_domain=None, rrf_k=60):
+		'''
+		fusion:
+			- 'rrf'   → Σ 1 / (rrf_k + rank), robust to incomparable domain scores
+			- 'score' → similarity min-max normalized per domain
+		k_domain: hits fetched per domain (None → k)
+		'''
+		domain_ids   = list(dict.fromkeys(domain_ids))
+		query_matrix = self._to_query_matrix(query_vector)
+
+		for domain_id in domain_ids:
+			self._get_domain_index(domain_id)  # Create missing indexes before fan-out
+
+		with ThreadPoolExecutor(max_workers=max(len(domain_ids), 1)) as pool:
+			rankings = list(pool.map(
+				lambda domain_id: self.query(domain_id, query_matrix, k_domain or k),
+				domain_ids
+			))
+
+		return self.fuse(dict(zip(domain_ids, rankings)), k, fusion, rrf_k)
+
+	# Query in thread pool, not blocking asyncio event loop
+	# ----------------------------------------------------------------------
+	async def query_async(self, domain_id, query_vector, k=5, document_ids=None, nprobe=None, ef_search=None):
+		return await asyncio.to_thread(self.query, domain_id, query_vector, k, document_ids, nprobe, ef_search)
+
+	# Federated query in thread pool, not blocking asyncio event loop
+	# ----------------------------------------------------------------------
+	async def query_federated_async(self, domain_ids, query_vector, k=5, fusion='rrf', k_domain=None, rrf_k=60):
+		return await asyncio.to_thread(self.query_federated, domain_ids, query_vector, k, fusion, k_domain, rrf_k)
+
+	# Fuse per-domain rankings {domain_id: [(id, score)]} into
+	# [(domain_id, id, fused score)], best first
+	# ----------------------------------------------------------------------
+	@staticmethod
+	def fuse(rankings, k, fusion='rrf', rrf_k=60):
+		if fusion not in ('rrf', 'score'):
+			raise ValueError(f'Unknown fusion `{fusion}`')
+
+		fused = {}
+
+		for domain_id, ranking in rankings.items():
+			scores = np.array([score for _, score in ranking], dtype='float32')
+
+			if fusion == 'rrf':
+				values = 1 / (rrf_k + np.arange(1, len(ranking) + 1))
+			elif len(scores) and scores.max() > scores.min():
+				values = (scores - scores.min()) / (scores.max() - scores.min())
+			else:
+				values = np.ones(len(scores))
+
+			for (id, _), value in zip(ranking, values):
+				key        = (domain_id, id)
+				fused[key] = fused.get(key, 0) + float(value)
+
+		hits = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+		return [(domain_id, id, score) for (domain_id, id), score in hits]
+
+	# ======================================================================
+	# TEST METHODS
+	# ======================================================================
+
+	# Recall@k of domain ANN index against exact flat search, per setting
+	# ----------------------------------------------------------------------
+	def test_recall(self, domain_id, k=10, sample_size=200, settings=None, reference=None):
+		'''
+		reference: (ids, vectors) of original vectors; None → vectors decoded
+		from index (compression loss then does not show up in recall).
+		'''
+		ids, vectors      = reference if reference is not None else self._get_vectors(domain_id)
+		vectors           = Norm.to_sphere(torch.as_tensor(vectors)).numpy().astype('float32')
+		faiss_index       = self._get_domain_index(domain_id)
+		kind, compression = self._get_layout(faiss_index)
+		exact             = self._build_index(('flat', None), self.get_config(domain_id), np.asarray(ids, dtype='int64'), vectors)
+
+		rng     = np.random.default_rng(0)
+		queries = vectors[rng.choice(len(vectors), min(sample_size, len(vectors)), replace=False)]
+		noise   = rng.normal(scale=0.05, size=queries.shape).astype('float32')  # Off-index queries
+		queries = Norm.to_sphere(torch.from_numpy(queries + noise)).numpy()
+
+		if settings is None:
+			if   kind == 'ivf'  : settings = [{'nprobe': n} for n in (1, 4, 16, 64)]
+			elif kind == 'hnsw' : settings = [{'ef_search': n} for n in (16, 32, 64, 128)]
+			else                : settings = [{}]
 
-		n = max(k * 8, 64)
-		scores, ids = faiss_index.search(query_vector, n)
+		print(f'\n=== `{kind}/{compression or "float32"}` recall@{k} vs exact flat ===')
+		print(f'Vectors: {len(ids)}, queries: {len(queries)}\n')
 
-		allowed_docs = set(document_ids) if document_ids is not None else None
-		result       = []
-		seen         = set()
+		start = time.perf_counter()
+		_, expected = exact.search(queries, k)
+		exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
 
-		for faiss_id, score in zip(ids[0], scores[0]):
-			if faiss_id >= 0:
-				ok = True
+		results = []
+		for setting in settings:
+			params = self._get_search_params(domain_id, setting.get('nprobe'), setting.get('ef_search'))
+			start  = time.perf_counter()
+			_, got = faiss_index.search(queries, k, params=params)
+			ann_ms = (time.perf_counter() - start) * 1000 / len(queries)
 
-				if allowed_docs is not None:
-					ok = Sid(faiss_id).document_id in allowed_docs
+			hits   = sum(len(set(g) & set(e)) for g, e in zip(got, expected))
+			result = {**setting, 'recall': hits / expected.size, 'ms': ann_ms, 'exact_ms': exact_ms}
+			results.append(result)
 
-				if ok and faiss_id not in seen:
-					result.append(faiss_id)
-					seen.add(faiss_id)
+			label = ', '.join(f'{key}={value}' for key, value in setting.items()) or 'default'
+			print(f'{label:<16}: recall {result["recall"]:.4f}, {ann_ms:.3f} ms/query (exact {exact_ms:.3f})')
 
-		return result
\ No newline at end of file
+		return results
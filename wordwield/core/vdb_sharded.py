@@ -0,0 +1,332 @@
+# ======================================================================
+# Sharded vector database: domain atoms partitioned by document id across
+# worker processes, each holding its own Vdb. Queries scatter to shards
+# and top-k results are gathered and merged. Same API as Vdb.
+# ======================================================================
+
+import os
+import heapq
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import faiss
+import torch
+import numpy as np
+
+from wordwield.core.vdb import Vdb
+from wordwield.core.sid import Sid
+
+
+_worker_vdb = None  # Vdb living in worker process
+
+
+# Create worker-local Vdb holding one shard of every domain
+# ----------------------------------------------------------------------
+def _init_worker(dim, path, config, threads):
+	global _worker_vdb
+
+	_worker_vdb = Vdb(dim, path=path, config=config)
+	faiss.omp_set_num_threads(threads)
+
+# Call Vdb method in worker process
+# ----------------------------------------------------------------------
+def _call_shard(method, *args, **kwargs):
+	return getattr(_worker_vdb, method)(*args, **kwargs)
+
+
+class ShardedVdb:
+	def __init__(self, dim, path=None, config=None, shards=None, threads_per_shard=1):
+		self.dim      = dim
+		self.path     = path                                         # Snapshot directory, one sub-directory per shard
+		self.config   = {**Vdb.DEFAULT_CONFIG, **(config or {})}
+		self.configs  = {}                                           # domain_id → index config
+		self.versions = {}                                           # domain_id → domain version of last snapshot
+		self.shards   = shards or max(1, os.cpu_count() or 1)
+		self.workers  = [
+			ProcessPoolExecutor(
+				max_workers = 1,                                     # One process per shard: shard state stays put
+				mp_context  = multiprocessing.get_context('spawn'),
+				initializer = _init_worker,
+				initargs    = (
+					dim,
+					os.path.join(path, f'shard_{n}') if path is not None else None,
+					self._get_shard_config(self.config),
+					threads_per_shard
+				)
+			)
+			for n in range(self.shards)
+		]
+
+	# ======================================================================
+	# PRIVATE METHODS
+	# ======================================================================
+
+	# Shard owning document (int or array): ids are spread round-robin so
+	# sequentially allocated documents balance across shards
+	# ----------------------------------------------------------------------
+	def _get_shard(self, document_id):
+		return document_id % self.shards
+
+	# Shard config: promotion threshold split, so domains promote at
+	# about the configured total size
+	# ----------------------------------------------------------------------
+	def _get_shard_config(self, config):
+		return {**config, 'promote_at': -(-config['promote_at'] // self.shards)}
+
+	# Run Vdb method on shards concurrently, return results in shard order
+	# ----------------------------------------------------------------------
+	def _scatter(self, method, *args, shards=None, **kwargs):
+		shards  = range(self.shards) if shards is None else shards
+		futures = [self.workers[n].submit(_call_shard, method, *args, **kwargs) for n in shards]
+		return [future.result() for future in futures]
+
+	# Group document ids by owning shard
+	# ----------------------------------------------------------------------
+	def _group_documents(self, document_ids):
+		groups = {}
+		for document_id in document_ids:
+			groups.setdefault(self._get_shard(document_id), []).append(document_id)
+		return groups
+
+	# Merge per-shard rankings [(id, score)] into global top-k
+	# ----------------------------------------------------------------------
+	def _merge(self, rankings, k=None):
+		hits = [hit for ranking in rankings for hit in ranking]
+		return heapq.nlargest(k if k is not None else len(hits), hits, key=lambda hit: hit[1])
+
+	# Layout of largest shard from per-shard stats
+	# ----------------------------------------------------------------------
+	def _get_layout(self, shards):
+		stats = max(shards, key=lambda shard: shard['size'])
+		return stats['kind'], stats['compression']
+
+	# Query matrix as picklable float32 array
+	# ----------------------------------------------------------------------
+	def _to_array(self, query_matrix):
+		if isinstance(query_matrix, torch.Tensor):
+			query_matrix = query_matrix.detach().cpu().numpy()
+		return np.asarray(query_matrix, dtype='float32')
+
+	# Scatter query to shards (restricted to owners of document_ids),
+	# return per-shard results
+	# ----------------------------------------------------------------------
+	def _scatter_query(self, method, domain_id, query_matrix, document_ids, **kwargs):
+		if document_ids is None:
+			results = self._scatter(method, domain_id, self._to_array(query_matrix), **kwargs)
+		else:
+			groups  = self._group_documents(document_ids)
+			futures = [
+				self.workers[shard].submit(
+					_call_shard, method, domain_id, self._to_array(query_matrix),
+					document_ids = documents,
+					**kwargs
+				)
+				for shard, documents in groups.items()
+			]
+			results = [future.result() for future in futures]
+
+		return results
+
+	# ======================================================================
+	# PUBLIC METHODS
+	# ======================================================================
+
+	# Add vector batch with explicit IDs (Sid ints), routed to owning shards
+	# ----------------------------------------------------------------------
+	def add(self, domain_id, vector_ids, vector_values):
+		assert len(vector_ids) == len(vector_values)
+
+		vector_ids    = np.asarray(vector_ids, dtype='int64')
+		vector_values = torch.as_tensor(vector_values).cpu()
+		shards        = self._get_shard(Sid.get_document_ids(vector_ids))
+		futures       = []
+
+		for shard in np.unique(shards):
+			mask = shards == shard
+			futures.append(self.workers[shard].submit(
+				_call_shard, 'add', domain_id, vector_ids[mask].tolist(), vector_values[torch.from_numpy(mask)]
+			))
+
+		for future in futures:
+			future.result()
+
+	# Remove domain from all shards, or document from its shard
+	# ----------------------------------------------------------------------
+	def remove(self, domain_id, document_id=None):
+		if document_id is None:
+			self._scatter('remove', domain_id)
+			self.configs.pop(domain_id, None)
+			self.versions.pop(domain_id, None)
+		else:
+			self._scatter('remove', domain_id, document_id, shards=[self._get_shard(document_id)])
+
+	# Physically remove tombstoned vectors of domain on all shards now
+	# ----------------------------------------------------------------------
+	def compact(self, domain_id):
+		self._scatter('compact', domain_id)
+
+	# Get domain index config (defaults when not configured)
+	# ----------------------------------------------------------------------
+	def get_config(self, domain_id):
+		return self.configs.get(domain_id, self.config)
+
+	# Configure domain index on all shards
+	# ----------------------------------------------------------------------
+	def set_config(self, domain_id, config=None):
+		config = {**self.config, **(config or {})}
+
+		self._scatter('set_config', domain_id, self._get_shard_config(config))
+		self.configs[domain_id] = config
+
+		return config
+
+	# Number of vectors in domain index over all shards
+	# ----------------------------------------------------------------------
+	def get_size(self, domain_id):
+		return sum(self._scatter('get_size', domain_id))
+
+	# Domain index layout: layout of largest shard (shards promote separately)
+	# ----------------------------------------------------------------------
+	def get_layout(self, domain_id):
+		return self._get_layout(self._scatter('get_stats', domain_id))
+
+	# Domain index stats summed over shards, with per-shard breakdown
+	# ----------------------------------------------------------------------
+	def get_stats(self, domain_id):
+		shards            = self._scatter('get_stats', domain_id)
+		kind, compression = self._get_layout(shards)
+		memory            = sum(shard['memory']      for shard in shards)
+		memory_flat       = sum(shard['memory_flat'] for shard in shards)
+
+		return {
+			'kind'        : kind,
+			'compression' : compression,
+			'size'        : sum(shard['size'] for shard in shards),
+			'dead'        : sum(shard['dead'] for shard in shards),
+			'memory'      : memory,
+			'memory_flat' : memory_flat,
+			'ratio'       : memory / memory_flat if memory_flat else 1.0,
+			'config'      : self.get_config(domain_id),
+			'shards'      : shards
+		}
+
+	# Save domain snapshot of every shard tagged with domain version
+	# ----------------------------------------------------------------------
+	def save_snapshot(self, domain_id, version, created=None):
+		self._scatter('save_snapshot', domain_id, version, created)
+		self.versions[domain_id] = version
+
+	# Load domain snapshots of all shards, return meta or None when
+	# any shard is missing or shards disagree on version
+	# ----------------------------------------------------------------------
+	def load_snapshot(self, domain_id, mmap=True):
+		metas = self._scatter('load_snapshot', domain_id, mmap)
+		meta  = None
+
+		if all(metas) and len({(shard['version'], shard['created']) for shard in metas}) == 1:
+			meta = {
+				'version' : metas[0]['version'],
+				'created' : metas[0]['created'],
+				'layout'  : self.get_layout(domain_id),
+				'ntotal'  : sum(shard['ntotal'] for shard in metas)
+			}
+			self.versions[domain_id] = meta['version']
+
+		return meta
+
+	# Delete domain snapshot files of all shards
+	# ----------------------------------------------------------------------
+	def drop_snapshot(self, domain_id):
+		self._scatter('drop_snapshot', domain_id)
+		self.versions.pop(domain_id, None)
+
+	# Query domain by vector: every shard searches its part, top-k merged;
+	# returns [(sid, similarity)], best first
+	# ----------------------------------------------------------------------
+	def query(self, domain_id, query_vector, k=5, document_ids=None, nprobe=None, ef_search=None):
+		return self.query_many(domain_id, query_vector, k, document_ids, nprobe, ef_search)[0]
+
+	# Query domain with matrix of query vectors, [(sid, similarity)] per row
+	# (one empty list per row when no shard is queried, e.g. no document_ids)
+	# ----------------------------------------------------------------------
+	def query_many(self, domain_id, query_matrix, k=5, document_ids=None, nprobe=None, ef_search=None):
+		query_matrix = self._to_array(query_matrix).reshape(-1, self.dim)
+		results      = self._scatter_query(
+			'query_many', domain_id, query_matrix, document_ids,
+			k         = k,
+			nprobe    = nprobe,
+			ef_search = ef_search
+		)
+		return [self._merge(rankings, k) for rankings in zip(*results)] if results else [[] for _ in query_matrix]
+
+	# All atoms with similarity above threshold, [(sid, similarity)] best first
+	# ----------------------------------------------------------------------
+	def range_search(self, domain_id, query_vector, threshold, document_ids=None, limit=None, nprobe=None, ef_search=None):
+		results = self._scatter_query(
+			'range_search', domain_id, query_vector, document_ids,
+			threshold = threshold,
+			limit     = limit,
+			nprobe    = nprobe,
+			ef_search = ef_search
+		)
+		return self._merge(results, limit)
+
+	# Query several domains (all shards of all domains at once) and fuse
+	# their rankings into [(domain_id, id, fused score)], best first
+	# ----------------------------------------------------------------------
+	def query_federated(self, domain_ids, query_vector, k=5, fusion='rrf', k_domain=None, rrf_k=60):
+		domain_ids   = list(dict.fromkeys(domain_ids))
+		query_matrix = self._to_array(query_vector)
+		futures      = {
+			domain_id: [worker.submit(_call_shard, 'query', domain_id, query_matrix, k_domain or k) for worker in self.workers]
+			for domain_id in domain_ids
+		}
+		rankings     = {
+			domain_id: self._merge([future.result() for future in shard_futures], k_domain or k)
+			for domain_id, shard_futures in futures.items()
+		}
+
+		return Vdb.fuse(rankings, k, fusion, rrf_k)
+
+	# Query in thread, not blocking asyncio event loop
+	# ----------------------------------------------------------------------
+	async def query_async(self, domain_id, query_vector, k=5, document_ids=None, nprobe=None, ef_search=None):
+		return await asyncio.to_thread(self.query, domain_id, query_vector, k, document_ids, nprobe, ef_search)
+
+	# Federated query in thread, not blocking asyncio event loop
+	# ----------------------------------------------------------------------
+	async def query_federated_async(self, domain_ids, query_vector, k=5, fusion='rrf', k_domain=None, rrf_k=60):
+		return await asyncio.to_thread(self.query_federated, domain_ids, query_vector, k, fusion, k_domain, rrf_k)
+
+	# Stop shard processes
+	# ----------------------------------------------------------------------
+	def close(self):
+		for worker in self.workers:
+			worker.shutdown(wait=True, cancel_futures=True)
+
+	# ======================================================================
+	# TEST METHODS
+	# ======================================================================
+
+	# Recall@k of every shard index against exact flat search
+	# ----------------------------------------------------------------------
+	def test_recall(self, domain_id, k=10, sample_size=200, settings=None, reference=None):
+		if reference is not None:
+			ids, vectors = np.asarray(reference[0], dtype='int64'), torch.as_tensor(reference[1]).cpu()
+			shards       = self._get_shard(Sid.get_document_ids(ids))
+
+		results = []
+		for n, size in enumerate(self._scatter('get_size', domain_id)):
+			if not size:
+				continue
+
+			shard_reference = None
+			if reference is not None:
+				mask            = shards == n
+				shard_reference = (ids[mask], vectors[torch.from_numpy(mask)])
+
+			print(f'\n--- Shard {n} ---')
+			results.append(self._scatter('test_recall', domain_id, k, sample_size, settings, shard_reference, shards=[n])[0])
+
+		return results
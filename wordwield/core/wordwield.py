@@ -1,14 +1,16 @@
 import os, sys, asyncio, shutil, yaml
 from dotenv import dotenv_values
 
-from sqlalchemy                  import create_engine, inspect, text
-from sqlalchemy.orm              import sessionmaker
-from wordwield.core.base.record  import Base, Record
-from wordwield.core.base         import Service
-from wordwield.core.fs           import Directory, File
-from wordwield.core.encoder      import Encoder
-
-from wordwield.core              import (
+from sqlalchemy                      import create_engine, inspect, text
+from sqlalchemy.orm                  import sessionmaker
+from wordwield.core.base.record      import Base, Record
+from wordwield.core.base             import Service
+from wordwield.core.fs               import Directory, File
+from wordwield.core.encoder          import Encoder
+from wordwield.core.embedding_cache  import EmbeddingCache
+from wordwield.core.encoder_pool     import EncoderPool
+
+from wordwield.core                  import (
 	Operator,
 	Module,
 	O,
@@ -34,6 +36,7 @@ class WordWield(metaclass=WordWieldMeta):
 	schemas        = None
 	models         = None
 	env            = None
+	encoder_pool   = None
 
 	# Initialize WordWield framework for given project.
 	# ----------------------------------------------------------------------
@@ -65,11 +68,36 @@ class WordWield(metaclass=WordWieldMeta):
 
 	@classmethod
 	def _warmup(cls):
-		cls.encoder = Encoder()
+		cache = EmbeddingCache(
+			path             = os.path.join(cls.config.CACHE_DIR, 'embeddings.db'),
+			max_memory_items = int(cls.env.get('ENCODER_CACHE_MEMORY_ITEMS', 50_000)),
+			max_disk_items   = int(cls.env.get('ENCODER_CACHE_DISK_ITEMS', 1_000_000))
+		)
+		cls.encoder = Encoder(
+			max_batch_tokens = int(cls.env.get('ENCODER_MAX_BATCH_TOKENS', 8192)),
+			cache            = cache,
+			backend          = cls.env.get('ENCODER_BACKEND', 'torch'),  # 'torch' | 'onnx' | 'onnx-int8'
+			backend_dir      = os.path.join(cls.config.CACHE_DIR, 'onnx')
+		)
 		cls.log_info('Warming up encoder:')
 		cls.encoder.encode('Warmup')
-		cls.log_info(f'- Model : `{cls.encoder.model_name}`')
-		cls.log_info(f'- Dim   : {cls.encoder.dim}')
+		cls.log_info(f'- Model        : `{cls.encoder.model_name}`')
+		cls.log_info(f'- Backend      : `{cls.encoder.backend.name}`')
+		if cls.encoder.backend.drift is not None:
+			cls.log_info(f'- Drift        : {cls.encoder.backend.drift}')
+		cls.log_info(f'- Dim          : {cls.encoder.dim}')
+		cls.log_info(f'- Batch tokens : {cls.encoder.max_batch_tokens}')
+
+		# Worker processes for large ingestion jobs: None → in-process, 'auto' → one per core.
+		# Workers are spawned, so entry points must be guarded by `if __name__ == '__main__'`.
+		workers = cls.env.get('ENCODER_WORKERS')
+		if workers:
+			cls.encoder_pool = EncoderPool(
+				cls.encoder,
+				workers            = None if workers == 'auto' else int(workers),
+				threads_per_worker = int(cls.env.get('ENCODER_THREADS_PER_WORKER', 1))
+			)
+			cls.log_info(f'- Workers      : {cls.encoder_pool.workers}')
 
 	# Load environment from WordWield root .env with project .env overrides.
 	# ----------------------------------------------------------------------
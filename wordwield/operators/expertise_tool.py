@@ -15,17 +15,20 @@ class ExpertiseTool(Tool):
 	# PUBLIC METHODS
 	# ======================================================================
 
-	# Perform semantic web search and return relevant chunks
+	# Perform semantic expertise search and return relevant chunks; runs off
+	# the agent loop, deadline_ms bounds it even inside one long document
 	# ----------------------------------------------------------------------
 	async def invoke(self,
-		query     : str,  # User-provided search query or intent text
-		top_k     : int,
-		max_steps : int
+		query       : str,         # User-provided search query or intent text
+		top_k       : int,
+		max_steps   : int,
+		deadline_ms : int = None   # Latency budget: best results so far returned when it hits
 	) -> list[str]:
 		
-		items = ww.services.ExpertiseService.search(
-			query     = query,
-			top_k     = top_k,
-			max_steps = max_steps
+		items = await ww.services.ExpertiseService.search_async(
+			query       = query,
+			top_k       = top_k,
+			max_steps   = max_steps,
+			deadline_ms = deadline_ms
 		)
 		return items
@@ -25,32 +25,50 @@ class ExpertiseService(Service):
 		fs_docs     = Directory(self.folder).list_files(extensions=self.readable_ext)
 		domain_docs = self.rag.get_documents(self.domain_id)
 
-		# Remove if deleted in fs, fs has newer version
+		# Remove if deleted in fs, fs has newer version (follow-on parts of
+		# large files go with their file)
 		for domain_doc in domain_docs:
-			if domain_doc.key not in fs_docs or domain_doc.mtime < fs_docs[domain_doc.key]:
+			key = self.rag.get_base_key(domain_doc.key)
+			if key not in fs_docs or domain_doc.mtime < fs_docs[key]:
 				self.rag.unset_document(self.domain_id, domain_doc.id)
 
 		# Index missing/removed files
 		domain_docs      = self.rag.get_documents(self.domain_id)
-		domain_docs_keys = {d.key for d in domain_docs}
+		domain_docs_keys = {self.rag.get_base_key(d.key) for d in domain_docs}
 
 		for key in fs_docs:
 			if key not in domain_docs_keys:
 				self.ww.log_info(f'Indexing `{key}`')
-				text  = File(key).read()
 				mtime = int(fs_docs[key])
-				self.rag.set_document(
+				self.rag.set_document_stream(
 					domain_id    = self.domain_id,
 					document_key = key,
-					text         = text,
+					chunks       = File(key).read_chunks(),
 					mtime        = mtime
 				)
 
 	# ------------------------------------------------------------------
-	def search(self, query, top_k, max_steps):
+	def search(self, query, top_k, max_steps, patience=None, deadline_ms=None, cancel=None):
 		return self.rag.search(
-			domain_id = self.domain_id,
-			query     = query,
-			top_k     = top_k,
-			max_steps = max_steps
+			domain_id   = self.domain_id,
+			query       = query,
+			top_k       = top_k,
+			max_steps   = max_steps,
+			patience    = patience,
+			deadline_ms = deadline_ms,
+			cancel      = cancel
+		)
+
+	# Search in worker thread; deadline_ms / cancel (or cancelling the
+	# awaiting task) stop it with results found so far
+	# ------------------------------------------------------------------
+	async def search_async(self, query, top_k, max_steps, patience=None, deadline_ms=None, cancel=None):
+		return await self.rag.search_async(
+			domain_id   = self.domain_id,
+			query       = query,
+			top_k       = top_k,
+			max_steps   = max_steps,
+			patience    = patience,
+			deadline_ms = deadline_ms,
+			cancel      = cancel
 		)
@@ -2,16 +2,29 @@
 # Rag service coordinating semantic DB and vector DB.
 # ======================================================================
 
+import os
+import math
+import time
+import asyncio
+import threading
 import torch
-
-from wordwield.core.base.service          import Service
-from wordwield.core.db.semantic_domain    import SemanticDomain
-from wordwield.core.db.semantic_document  import SemanticDocument
-from wordwield.core.db.semantic_atom      import vector_deserialize
-from wordwield.core.vdb                   import Vdb
-from wordwield.core.sid                   import Sid
-from wordwield.core.sentencizers          import PysbdSentencizer as Sentencizer
-from wordwield.libs.yo                    import yo
+import numpy as np
+
+from wordwield.core.base.service                import Service
+from wordwield.core.db.semantic_domain          import SemanticDomain
+from wordwield.core.db.semantic_document        import SemanticDocument
+from wordwield.core.db.semantic_atom            import SemanticAtom, vector_deserialize
+from wordwield.core.db.semantic_domain_log      import SemanticDomainLog
+from wordwield.core.db.semantic_domain_index    import SemanticDomainIndex
+from wordwield.core.db.semantic_document_kernel import SemanticDocumentKernel
+from wordwield.core.vdb                         import Vdb
+from wordwield.core.vdb_sharded                 import ShardedVdb
+from wordwield.core.ingest_stream               import IngestStream
+from wordwield.core.atom_store                  import AtomStore
+from wordwield.core.sid                         import Sid
+from wordwield.core.affinity                    import build_affinity
+from wordwield.core.sentencizers                import PysbdSentencizer as Sentencizer
+from wordwield.libs.yo                          import yo
 
 
 def make_halt_sentence_stability(
@@ -23,6 +36,7 @@ def make_halt_sentence_stability(
 	Halt when top_k sentence indices stop changing.
 
 	patience = how many consecutive identical steps are required
+	halt.ticks = steps seen so far (telemetry)
 	"""
 
 	last_set     = None
@@ -31,6 +45,8 @@ def make_halt_sentence_stability(
 	def halt(**facets):
 		nonlocal last_set, stable_steps
 
+		halt.ticks += 1
+
 		kernel = facets.get(facet_name)
 		if kernel is None:
 			return False
@@ -47,18 +63,94 @@ def make_halt_sentence_stability(
 
 		return stable_steps >= patience
 
+	halt.ticks = 0
 	return halt
 
 
+class _AnyEvent:
+	'''
+	Cancellation token set when any of its tokens is set.
+	'''
+	def __init__(self, *tokens):
+		self.tokens = tokens
+
+	def is_set(self):
+		return any(token.is_set() for token in self.tokens)
+
+
+class SearchResults(dict):
+	'''
+	{document_key: lines}, plus search report: documents run through the
+	retriever (searched) and left out for holding no candidate atom (skipped),
+	and retriever ticks actually used per searched document. partial: deadline
+	or cancellation stopped search before every document was searched.
+	Report is not part of dict items: use get_stats() / to_dict() to keep it.
+	'''
+	def __init__(self):
+		super().__init__()
+		self.searched = 0
+		self.skipped  = 0
+		self.ticks    = {}  # document_key → ticks run (≤ max_steps)
+		self.partial  = False
+
+	# Search report as plain dict
+	# ------------------------------------------------------------------
+	def get_stats(self):
+		return {
+			'searched' : self.searched,
+			'skipped'  : self.skipped,
+			'ticks'    : dict(self.ticks),
+			'partial'  : self.partial
+		}
+
+	# Serializable form: lines and search report
+	# ------------------------------------------------------------------
+	def to_dict(self):
+		return {'results': dict(self), **self.get_stats()}
+
 
 class RagService(Service):
+	PART_SEP = '#part-'  # Follow-on document key suffix for texts past SemanticDocument.MAX_ATOMS atoms
 
 	# To initialize vector database and hydrate it from persistent atoms.
 	# ------------------------------------------------------------------
 	def initialize(self):
 		self.encoder     = self.ww.encoder
+		self.ingester    = self.ww.encoder_pool or self.ww.encoder  # Multi-process when configured
 		self.sentencizer = Sentencizer()
-		self.vdb         = Vdb(self.ww.encoder.dim)
+		config           = {
+			'index'      : self.ww.env.get('VDB_INDEX', 'flat'),                                     # Default kind: 'flat' | 'hnsw' | 'ivf'
+			'promote_at' : int(self.ww.env.get('VDB_PROMOTE_AT', 20_000)),                         # Vectors before flat is promoted
+			'nprobe'     : int(self.ww.env.get('VDB_NPROBE',    Vdb.DEFAULT_CONFIG['nprobe'])),    # IVF lists probed: recall ↔ latency
+			'ef_search'  : int(self.ww.env.get('VDB_EF_SEARCH', Vdb.DEFAULT_CONFIG['ef_search']))  # HNSW query beam: recall ↔ latency
+		}
+
+		# Shard processes for large domains: None → in-process, 'auto' → one per core
+		shards = self.ww.env.get('VDB_SHARDS')
+		if shards:
+			self.vdb = ShardedVdb(
+				self.ww.encoder.dim,
+				path   = os.path.join(self.ww.config.CACHE_DIR, 'vdb_sharded'),
+				config = config,
+				shards = None if shards == 'auto' else int(shards)
+			)
+		else:
+			self.vdb = Vdb(
+				self.ww.encoder.dim,
+				path   = os.path.join(self.ww.config.CACHE_DIR, 'vdb'),
+				config = config
+			)
+
+		kernel_mb = int(self.ww.env.get('RAG_KERNEL_CACHE_MB', 512))  # Memory for affinity kernels (LRU beyond)
+
+		self.snapshot_every = int(self.ww.env.get('VDB_SNAPSHOT_EVERY', 16))       # Logged ops between snapshots
+		self.atoms          = AtomStore(kernel_mb << 20)                           # Document atom matrices and kernel cache
+		self.candidates     = int(self.ww.env.get('RAG_CANDIDATES', 0))            # Prefilter atoms per query, 0 → off (every document searched)
+		self.affinity       = self.ww.env.get('RAG_AFFINITY', 'yo')                # 'yo' → yo.kernels.Affinity | 'precomputed' → cosine kernel persisted at ingest
+		self.dense_max      = int(self.ww.env.get('RAG_AFFINITY_DENSE', 1024))     # Precomputed: larger documents sparse when neighbours set
+		self.neighbours     = int(self.ww.env.get('RAG_AFFINITY_NEIGHBOURS', 0))   # Precomputed: neighbours per atom in sparse kernel, 0 → always dense
+		self.patience       = int(self.ww.env.get('RAG_HALT_PATIENCE', 2))         # Stable steps before retriever halts, 0 → run max_steps
+		self.retriever      = None                                                 # Sentence retriever config, resolved once
 		self._hydrate()
 
 	# ==================================================================
@@ -74,41 +166,179 @@ class RagService(Service):
 			# ------------------------------------------------------------------
 			for domain in SemanticDomain.get_all(temporary=True):
 				SemanticDomain.unset(domain.id)
+				SemanticDomainLog.unset(domain.id)
+				SemanticDomainIndex.unset(domain.id)
+				self.vdb.drop_snapshot(domain.id)
 
 			# 2. Load persistent domains into VDB
 			# ------------------------------------------------------------------
 			for domain in SemanticDomain.get_all(temporary=False):
+				self._hydrate_domain(domain)
 
-				vector_ids    = []
-				vector_values = []
-
-				for document in domain.get_documents():
-					for atom in document.atoms:
-						vector = vector_deserialize(atom.vector)
-						if vector is not None:
-							vector_ids.append(atom.id)
-							vector_values.append(vector)
-						else:
-							raise ValueError('Vector deserialization failed')
-
-				if vector_ids:
-					vectors = torch.stack(vector_values)
-					self.vdb.add(
-						domain_id     = domain.id,
-						vector_ids    = vector_ids,
-						vector_values = vectors
-					)
 			self.ww.db.commit()
 
 		except Exception:
 			self.ww.db.rollback()
 			raise
 
+	# Load domain snapshot and replay operations logged since.
+	# Full rebuild only when snapshot is missing or disagrees with DB.
+	# ------------------------------------------------------------------
+	def _hydrate_domain(self, domain):
+		config  = self.vdb.set_config(domain.id, SemanticDomainIndex.get(domain.id))
+		version = SemanticDomainLog.get_version(domain.id)
+		meta    = self.vdb.load_snapshot(domain.id)
+		valid   = (
+			meta is not None and
+			meta.get('created') == domain.created and
+			meta.get('layout') is not None and
+			meta['version'] <= version
+		)
+
+		if valid:
+			for entry in SemanticDomainLog.get_since(domain.id, meta['version']):
+				if entry.op == 'add':
+					document = SemanticDocument.get(domain.id, entry.document_id)
+					self._add_documents(domain.id, [document] if document else [])
+				else:
+					self.vdb.remove(domain.id, entry.document_id)
+
+			valid = self.vdb.get_size(domain.id) == SemanticAtom.count(domain.id)
+
+		if not valid:
+			self.ww.log_info(f'Rebuilding vector index of domain `{domain.key}`')
+			self.vdb.remove(domain.id)
+			self.vdb.set_config(domain.id, config)
+			self._add_documents(domain.id, domain.get_documents())
+
+		self.vdb.set_config(domain.id, config)  # Snapshot may hold other kind than configured
+
+		if not valid or meta['version'] != version or tuple(meta['layout']) != self.vdb.get_layout(domain.id):
+			self._save_snapshot(domain, version)
+
+		self._load_atoms(domain.id)
+
+	# Add atom vectors of documents to vector DB
+	# ------------------------------------------------------------------
+	def _add_documents(self, domain_id, documents):
+		vector_ids    = []
+		vector_values = []
+
+		for document in documents:
+			for atom in document.atoms:
+				vector = vector_deserialize(atom.vector)
+				if vector is not None:
+					vector_ids.append(atom.id)
+					vector_values.append(vector)
+				else:
+					raise ValueError('Vector deserialization failed')
+
+		if vector_ids:
+			vectors = torch.stack(vector_values)
+			self.vdb.add(
+				domain_id     = domain_id,
+				vector_ids    = vector_ids,
+				vector_values = vectors
+			)
+
+	# Load document atoms from DB into atom store: whole domain in one
+	# Sid range scan, or given documents
+	# ------------------------------------------------------------------
+	def _load_atoms(self, domain_id, document_ids=None):
+		if document_ids is None:
+			keys = {document.id: document.key for document in SemanticDomain.get(domain_id).get_documents()}
+			rows = SemanticAtom.get_range(*Sid.get_domain_id_range(domain_id))
+		else:
+			keys = {}
+			rows = []
+			for document_id in document_ids:
+				document = SemanticDocument.get(domain_id, document_id)
+				if document is not None:
+					keys[document.id] = document.key
+					rows             += SemanticAtom.get_range(*Sid.get_document_id_range(document.id, domain_id))
+
+		self.atoms.set_many(domain_id, keys, rows)
+		self._persist_kernels(domain_id, keys)
+
+	# Precomputed affinity: build and persist kernels of stored documents
+	# that are missing or stale (atom count changed); search loads them
+	# lazily into kernel cache. Dense kernels of documents above dense_max
+	# are not persisted (S × S blob), they are built on first search
+	# ------------------------------------------------------------------
+	def _persist_kernels(self, domain_id, document_ids):
+		if self.affinity != 'precomputed':
+			return
+
+		sizes = SemanticDocumentKernel.get_sizes(domain_id, 'affinity', document_ids)
+		built = False
+
+		for document_id in document_ids:
+			atoms = self.atoms.get(domain_id, document_id)
+
+			if atoms is None or not len(atoms) or (len(atoms) > self.dense_max and not self.neighbours):
+				continue
+
+			if sizes.get(document_id) != len(atoms):
+				SemanticDocumentKernel.set(domain_id, document_id, 'affinity', self._build_kernel(atoms.vectors))
+				built = True
+
+		if built:
+			self.ww.db.commit()
+
+	# Precomputed affinity kernel of document vectors: dense, or sparse
+	# neighbour graph when configured
+	# ------------------------------------------------------------------
+	def _build_kernel(self, vectors):
+		return build_affinity(vectors, self.dense_max, self.neighbours)
+
+	# Affinity kernel of document from kernel cache. On miss: yo's Affinity,
+	# or persisted precomputed kernel (rebuilt in memory when load is off,
+	# e.g. in worker threads: same values)
+	# ------------------------------------------------------------------
+	def _get_kernel(self, atoms, load=True):
+		kernel = self.atoms.kernels.get(atoms.domain_id, atoms.id, 'affinity')
+
+		if kernel is None:
+			if self.affinity == 'precomputed':
+				kernel = SemanticDocumentKernel.get(atoms.domain_id, atoms.id, 'affinity') if load else None
+				if kernel is None or kernel.shape[0] != len(atoms):
+					kernel = self._build_kernel(atoms.vectors)
+			else:
+				kernel = yo.kernels.Affinity(atoms.vectors)
+
+			self.atoms.kernels.set(atoms.domain_id, atoms.id, 'affinity', kernel, len(atoms))
+
+		return kernel
+
+	# Sentence retriever config, resolved once per process
+	# ------------------------------------------------------------------
+	def _get_retriever(self):
+		if self.retriever is None:
+			self.retriever = yo.twinkle.apps.sentence_retriever
+		return self.retriever
+
+	# Snapshot persistent domain index, drop log entries it covers
+	# ------------------------------------------------------------------
+	def _save_snapshot(self, domain, version):
+		self.vdb.save_snapshot(domain.id, version, domain.created)
+		SemanticDomainLog.unset_before(domain.id, version)
+
+	# Snapshot domain once enough operations are logged since last one
+	# ------------------------------------------------------------------
+	def _save_snapshot_if_due(self, domain_id):
+		domain = SemanticDomain.get(domain_id)
+
+		if domain is not None and not domain.temporary:
+			version = self.vdb.versions.get(domain.id, 0)
+			if SemanticDomainLog.count_since(domain.id, version) >= self.snapshot_every:
+				self._save_snapshot(domain, SemanticDomainLog.get_version(domain.id))
+				self.ww.db.commit()
+
 	# Split full document text into atom texts and vectors.
 	# ------------------------------------------------------------------
 	def _vectorize(self, text: str):
 		texts   = self.sentencizer.to_sentences(text)
-		vectors = self.encoder.encode_sequence(texts)
+		vectors = self.ingester.encode_sequence_batch(texts, window_pooling='length')
 		return texts, vectors
 
 	# ==================================================================
@@ -116,14 +346,34 @@ class RagService(Service):
 	# ==================================================================
 
 	# Create or ensure domain exists.
+	# index       : kind ('flat' | 'hnsw' | 'ivf') or dict of Vdb index config overrides.
+	# compression : None | 'sq8' | 'fp16' | 'pq' (applied once domain reaches promote_at).
 	# ------------------------------------------------------------------
-	def set_domain(self, key: str, *, meta: str | None = None, temporary: bool = False) -> int:
+	def set_domain(
+		self,
+		key         : str,
+		*,
+		meta        : str | None         = None,
+		temporary   : bool               = False,
+		index       : str | dict | None  = None,
+		compression : str | None         = None
+	) -> int:
 		try:
 			domain_id = SemanticDomain.set(
 				key       = key,
 				meta      = meta,
 				temporary = temporary
 			)
+
+			if index is not None or compression is not None:
+				config = {'index': index} if isinstance(index, str) else dict(index or {})
+				if compression is not None:
+					config['compression'] = compression
+
+				config = {**(SemanticDomainIndex.get(domain_id) or {}), **config}
+				self.vdb.set_config(domain_id, config)
+				SemanticDomainIndex.set(domain_id, config)
+
 			self.ww.db.commit()
 			return domain_id
 
@@ -131,6 +381,31 @@ class RagService(Service):
 			self.ww.db.rollback()
 			raise
 
+	# Vector index stats of domain: layout, size, memory vs plain float32
+	# ------------------------------------------------------------------
+	def get_domain_stats(self, domain_id):
+		return self.vdb.get_stats(domain_id)
+
+	# Recall@k of domain index against exact search over original atom vectors
+	# ------------------------------------------------------------------
+	def test_domain_recall(self, domain_id, k=10, sample_size=200, settings=None):
+		domain        = SemanticDomain.get(domain_id)
+		vector_ids    = []
+		vector_values = []
+
+		for document in domain.get_documents():
+			for atom in document.atoms:
+				vector_ids.append(atom.id)
+				vector_values.append(vector_deserialize(atom.vector))
+
+		return self.vdb.test_recall(
+			domain_id,
+			k           = k,
+			sample_size = sample_size,
+			settings    = settings,
+			reference   = (vector_ids, torch.stack(vector_values))
+		)
+
 	# Remove domain and all its documents and vectors.
 	# ------------------------------------------------------------------
 	def unset_domain(self, id_or_key: int | str) -> bool:
@@ -140,10 +415,14 @@ class RagService(Service):
 
 			if domain is not None:
 				if SemanticDomain.unset(domain.id):
+					SemanticDomainLog.unset(domain.id)
+					SemanticDomainIndex.unset(domain.id)
 					self.vdb.remove(domain.id)
 					removed = True
 
 			self.ww.db.commit()
+			if removed:
+				self.atoms.unset(domain.id)
 			return removed
 
 		except Exception:
@@ -184,13 +463,101 @@ class RagService(Service):
 					vector_values = vector_values
 				)
 
+			SemanticDomainLog.add(domain_id, document_id, 'add')
 			self.ww.db.commit()
+			self._load_atoms(domain_id, [document_id])
+			self._save_snapshot_if_due(domain_id)
 			return document_id
 
 		except Exception:
 			self.ww.db.rollback()
 			raise
 
+	# Create document from incrementally read text with flat memory use.
+	# Sentencize, encode and persist run as stages over bounded queues;
+	# atoms are flushed to DB and VDB chunk by chunk, committed at end.
+	# Atom ids are 16-bit: past MAX_ATOMS sentences text continues in
+	# follow-on documents keyed `<key>#part-<n>` (see get_base_key).
+	# Atom store gets the chunks as read, no DB reload; memory held after
+	# ingest is one vector matrix per part (≤ MAX_ATOMS × dim float32)
+	# ------------------------------------------------------------------
+	def set_document_stream(
+		self,
+		domain_id    : int | str,
+		*,
+		document_key : str,
+		chunks,
+		mtime        : int,
+		meta         : str | None = None,
+		batch_size   : int        = 256,
+		queue_size   : int        = 4
+	) -> int:
+		parts  = []  # [document, key, start offset, [(ids, texts, vectors)]] per part
+		stream = IngestStream(
+			sentences  = self.sentencizer.to_sentences_stream(chunks),
+			encoder    = self.ingester,
+			batch_size = batch_size,
+			queue_size = queue_size
+		)
+
+		try:
+			for offset, texts, vectors in stream:
+				while len(texts):
+					if not parts or offset - parts[-1][2] == SemanticDocument.MAX_ATOMS:
+						key         = document_key if not parts else f'{document_key}{self.PART_SEP}{len(parts) + 1}'
+						document_id = SemanticDocument.set(domain_id=domain_id, key=key, mtime=mtime, meta=meta)
+						parts.append([SemanticDocument.get(domain_id, document_id), key, offset, []])
+
+					document, _, start, gathered = parts[-1]
+					room       = SemanticDocument.MAX_ATOMS - (offset - start)
+					vector_ids = document.set_atoms(texts[:room], vectors[:room], offset=offset - start)
+
+					self.vdb.add(
+						domain_id     = domain_id,
+						vector_ids    = vector_ids,
+						vector_values = vectors[:room]
+					)
+					gathered.append((vector_ids, texts[:room], yo.to_numpy(vectors[:room])))
+
+					offset, texts, vectors = offset + len(vector_ids), texts[room:], vectors[room:]
+
+			if not parts:  # Empty text: document without atoms
+				document_id = SemanticDocument.set(domain_id=domain_id, key=document_key, mtime=mtime, meta=meta)
+				parts.append([SemanticDocument.get(domain_id, document_id), document_key, 0, []])
+
+			for document, _, _, _ in parts:
+				SemanticDomainLog.add(domain_id, document.id, 'add')
+
+			self.ww.db.commit()
+
+			for document, key, _, gathered in parts:
+				self.atoms.set_arrays(
+					domain_id, document.id, key,
+					np.array([id for ids, _, _ in gathered for id in ids], dtype='int64'),
+					[text for _, texts, _ in gathered for text in texts],
+					np.concatenate([vectors for _, _, vectors in gathered]) if gathered else np.zeros((0, self.ww.encoder.dim), dtype='float32')
+				)
+				gathered.clear()
+
+			self._persist_kernels(domain_id, [document.id for document, _, _, _ in parts])
+			self._save_snapshot_if_due(domain_id)
+			return parts[0][0].id
+
+		except Exception:
+			self.ww.db.rollback()
+			for document, _, _, _ in parts:
+				self.vdb.remove(domain_id=domain_id, document_id=document.id)
+			raise
+
+		finally:
+			stream.close()
+
+	# Document key without follow-on part suffix of streamed ingestion
+	# ------------------------------------------------------------------
+	@classmethod
+	def get_base_key(cls, document_key):
+		return document_key.split(cls.PART_SEP)[0]
+
 	# Remove document and all its atoms (DB + VDB)
 	# ------------------------------------------------------------------
 	def unset_document(self, domain_id: int, document_id: int) -> bool:
@@ -204,9 +571,12 @@ class RagService(Service):
 					document_id = document_id
 				)
 				SemanticDocument.unset(domain_id, document_id)
+				SemanticDomainLog.add(domain_id, document_id, 'remove')
 				removed = True
 
 			self.ww.db.commit()
+			self.atoms.unset(domain_id, document_id)
+			self._save_snapshot_if_due(domain_id)
 			return removed
 
 		except Exception:
@@ -220,46 +590,78 @@ class RagService(Service):
 		if domain is not None:
 			return domain.get_documents()
 
+	# Document (texts, vectors, affinity kernel, atom ids) from atom store,
+	# shared by all queries searching the document; load → DB may be read
+	# (documents missing from store, persisted kernels)
+	# ------------------------------------------------------------------
+	def get_document_matrix(self, document, load=True):
+		atoms = self.atoms.get(document.domain_id, document.id)
+
+		if atoms is None and load:  # Not in store yet (e.g. written outside this service)
+			self._load_atoms(document.domain_id, [document.id])
+			atoms = self.atoms.get(document.domain_id, document.id)
+
+		matrix = None
+		if atoms is not None and len(atoms):
+			matrix = (atoms.texts, atoms.vectors, self._get_kernel(atoms, load), atoms.ids)
+
+		return matrix
+
+	# Run sentence retriever on document; halts once top-k sentences are
+	# stable for patience steps (None → RAG_HALT_PATIENCE, 0 → max_steps),
+	# ticks run are recorded into ticks dict under document key; deadline
+	# or cancel stop it early with sentences found so far. hits: exact prefilter
+	# {sid: similarity} of document, reused in reranking. load=False keeps
+	# it off the DB (worker threads)
+	# ------------------------------------------------------------------
 	def search_document(
 		self,
 		document,
 		query_vector,
 		max_steps,
-		top_k
+		top_k,
+		matrix   = None,
+		patience = None,
+		ticks    = None,
+		deadline = None,
+		cancel   = None,
+		hits     = None,
+		load     = True
 	):
+		matrix = matrix or self.get_document_matrix(document, load)
 
-		vectors   = []
-		texts     = []
-		atom_ids  = []
-
-		for atom in document.atoms:
-			vector = vector_deserialize(atom.vector)
-			if vector is not None:
-				vectors.append(vector)
-				texts.append(atom.text)
-				atom_ids.append(atom.id)
-
-		if not vectors:
+		if matrix is None:
 			return []
 
-		vectors = yo.to_numpy(torch.stack(vectors))
+		texts, vectors, affinity, ids = matrix
 
 		# --------------------------------------------------------------
 		# Build SentenceRetriever from YAML via Twinkle
 		# --------------------------------------------------------------
 
 		twinkler = yo.twinkle.Twinkler.assemble(
-			config   = yo.twinkle.apps.sentence_retriever,
+			config   = self._get_retriever(),
 			document = vectors,
 			query    = query_vector,
-			affinity = yo.kernels.Affinity(vectors)
+			affinity = affinity
 		)
 
-		mask = twinkler.twinkle(
+		patience = self.patience if patience is None else patience
+		stable   = make_halt_sentence_stability(top_k, patience=patience or math.inf)
+		halt     = stable
+
+		if deadline is not None or cancel is not None:
+			halt = lambda **facets: stable(**facets) or self._is_due(deadline, cancel)
+
+		mask     = twinkler.twinkle(
 			max_tics = max_steps,
-			top_k    = top_k
+			top_k    = top_k,
+			halt     = halt
 		)
 
+		if ticks is not None:
+			ticks[document.key] = stable.ticks
+
 		# # idx сейчас — это НЕ indices, а history / output
 		# # предполагаем, что sentence_out — последний mask
 		# mask = twinkler.facets['f_sentence_out'].output()
@@ -268,65 +670,386 @@ class RagService(Service):
 			mask         = mask,
 			vectors      = vectors,
 			query_vector = query_vector,
-			top_k        = top_k
+			top_k        = top_k,
+			ids          = ids,
+			hits         = hits
 		)
 
 		lines = [(i, texts[i]) for i in sorted(idx)]
 		return lines
 
 
-	# Search
+	# Documents holding any of top-N domain atoms, per query row, as
+	# {document_id: {sid: similarity}}, best document first: coarse vector
+	# index stage before per-document retriever. None → no prefilter
 	# ------------------------------------------------------------------
-	def search(self, domain_id, query, top_k, max_steps):
-		domain  = SemanticDomain.get(domain_id)
-		results = {}
+	def _get_candidate_documents(self, domain_id, query_matrix, candidates=None, nprobe=None, ef_search=None):
+		candidates = self.candidates if candidates is None else candidates
+		documents  = None
 
-		if domain:
-			query_vector = self.encoder.encode(query)
-			for document in domain.get_documents():
-				lines = self.search_document(
-					document      = document,
-					query_vector  = yo.to_numpy(query_vector),
-					max_steps     = max_steps,
-					top_k         = top_k
-				)
+		if candidates:
+			hits      = self.vdb.query_many(domain_id, query_matrix, k=candidates, nprobe=nprobe, ef_search=ef_search)
+			documents = [{} for _ in hits]
+
+			for row, scores in zip(hits, documents):
+				for id, score in row:  # Best first: first hit of document is its best
+					scores.setdefault(Sid(id).document_id, {})[id] = score
+
+		return documents
+
+	# Prefilter similarities are exact cosines only on flat uncompressed
+	# index; approximate / quantized ones (HNSW, IVF, sq8, pq...) are not
+	# mixed with exact cosines in reranking
+	# ------------------------------------------------------------------
+	def _is_exact_index(self, domain_id):
+		return self.vdb.get_layout(domain_id) == ('flat', None)
+
+	# Documents in search priority order, most promising first: by best
+	# candidate hit, or (no prefilter) best atom cosine to query. Only an
+	# anytime search (deadline or cancel) may stop early, others keep
+	# store order: every document is searched anyway
+	# ------------------------------------------------------------------
+	def _rank_documents(self, documents, query_vector, hits=None, deadline=None, cancel=None):
+		if deadline is None and cancel is None:
+			return documents
+
+		if hits is not None:
+			scores = {document_id: max(document_hits.values()) for document_id, document_hits in hits.items()}
+		else:
+			query  = query_vector / (np.linalg.norm(query_vector) + 1e-9)
+			scores = {
+				document.id: float(np.max(document.vectors @ query / (document.norms + 1e-9)))
+				for document in documents if len(document)
+			}
+
+		return sorted(documents, key=lambda document: scores.get(document.id, -math.inf), reverse=True)
+
+	# Absolute deadline (monotonic seconds) from milliseconds budget
+	# ------------------------------------------------------------------
+	def _get_deadline(self, deadline_ms):
+		return time.monotonic() + deadline_ms / 1000 if deadline_ms is not None else None
+
+	# Deadline passed or search cancelled (cancel: threading.Event-like token)
+	# ------------------------------------------------------------------
+	def _is_due(self, deadline, cancel):
+		return (
+			(deadline is not None and time.monotonic() >= deadline) or
+			(cancel   is not None and cancel.is_set())
+		)
+
+	# Search ranked documents until done, deadline or cancellation;
+	# load=False → no DB access (run in worker thread after _prepare_search)
+	# ------------------------------------------------------------------
+	def _search_vector(self, domain_id, query_vector, top_k, max_steps, candidates, patience, deadline, cancel, nprobe, ef_search, load=True):
+		query_vector = yo.to_numpy(query_vector)
+		allowed      = self._get_candidate_documents(domain_id, query_vector, candidates, nprobe, ef_search)
+		allowed      = allowed[0] if allowed is not None else None
+		documents    = self.atoms.get_documents(domain_id)
+		results      = SearchResults()
+		reuse        = allowed is not None and self._is_exact_index(domain_id)
+
+		if allowed is not None:
+			results.skipped = sum(document.id not in allowed for document in documents)
+			documents       = [document for document in documents if document.id in allowed]
+
+		for document in self._rank_documents(documents, query_vector, allowed, deadline, cancel):
+			if self._is_due(deadline, cancel):
+				results.partial = True
+				break
+
+			results.searched += 1
+			lines = self.search_document(
+				document      = document,
+				query_vector  = query_vector,
+				max_steps     = max_steps,
+				top_k         = top_k,
+				patience      = patience,
+				ticks         = results.ticks,
+				deadline      = deadline,
+				cancel        = cancel,
+				hits          = allowed.get(document.id) if reuse else None,
+				load          = load
+			)
+
+			if lines:
+				results[document.key] = lines
+		else:
+			results.partial = self._is_due(deadline, cancel)  # Last document may be cut short
+
+		return results
+
+	# Search domain documents with encoded query vector; candidates → atoms
+	# prefetched from vector index, documents without hit are skipped
+	# (None → RAG_CANDIDATES, 0 → every document, the default).
+	# Anytime: with deadline_ms or cancel token, results found so far are
+	# returned flagged partial. nprobe / ef_search: prefilter ANN recall ↔
+	# latency per query (None → VDB_NPROBE / VDB_EF_SEARCH)
+	# ------------------------------------------------------------------
+	def search_vector(self, domain_id, query_vector, top_k, max_steps, candidates=None, patience=None, deadline_ms=None, cancel=None, nprobe=None, ef_search=None):
+		return self._search_vector(
+			domain_id, query_vector, top_k, max_steps, candidates, patience,
+			self._get_deadline(deadline_ms), cancel, nprobe, ef_search
+		)
+
+	# Search; deadline covers query encoding too
+	# ------------------------------------------------------------------
+	def search(self, domain_id, query, top_k, max_steps, candidates=None, patience=None, deadline_ms=None, cancel=None, nprobe=None, ef_search=None):
+		deadline     = self._get_deadline(deadline_ms)
+		query_vector = self.encoder.encode(query)
+		return self._search_vector(domain_id, query_vector, top_k, max_steps, candidates, patience, deadline, cancel, nprobe, ef_search)
+
+	# Search domain with several queries: one encoder batch, one prefilter
+	# search, document matrices shared; results keyed by query
+	# ------------------------------------------------------------------
+	def search_many(self, domain_id, queries, top_k, max_steps, candidates=None, patience=None, nprobe=None, ef_search=None):
+		queries = list(dict.fromkeys(queries))
+		results = {query: SearchResults() for query in queries}
+
+		if queries:
+			query_matrix = yo.to_numpy(self.encoder.encode_batch(queries))
+			allowed      = self._get_candidate_documents(domain_id, query_matrix, candidates, nprobe, ef_search) or [None] * len(queries)
+			reuse        = allowed[0] is not None and self._is_exact_index(domain_id)
+
+			for document in self.atoms.get_documents(domain_id):
+				matrix = None
+
+				for query, query_vector, documents in zip(queries, query_matrix, allowed):
+					if documents is not None and document.id not in documents:
+						results[query].skipped += 1
+						continue
+
+					matrix = matrix or self.get_document_matrix(document)
+					if matrix is None:
+						break
+
+					results[query].searched += 1
+					lines = self.search_document(
+						document     = document,
+						query_vector = query_vector,
+						max_steps    = max_steps,
+						top_k        = top_k,
+						matrix       = matrix,
+						patience     = patience,
+						ticks        = results[query].ticks,
+						hits         = documents.get(document.id) if reuse else None
+					)
+
+					if lines:
+						results[query][document.key] = lines
+
+		return results
+
+	# Resolve domain ids or keys into {domain_id: domain}
+	# ------------------------------------------------------------------
+	def _get_domains(self, domains):
+		domains = [
+			SemanticDomain.get(domain) if isinstance(domain, int) else SemanticDomain.get_by_key(domain)
+			for domain in domains
+		]
+		return {domain.id: domain for domain in domains if domain is not None}
+
+	# Tag fused vector hits with domain key, document key and atom text,
+	# resolved from atom store (sid → document → row)
+	# ------------------------------------------------------------------
+	def _get_federated_results(self, domains, hits):
+		results = []
+
+		for domain_id, atom_id, score in hits:
+			document_id = Sid(atom_id).document_id
+			atoms       = self.atoms.get(domain_id, document_id)
+
+			if atoms is None:  # Not in store yet (e.g. written outside this service)
+				self._load_atoms(domain_id, [document_id])
+				atoms = self.atoms.get(domain_id, document_id)
 
-				if lines:
-					results[document.key] = lines
+			row = atoms.get_row(atom_id) if atoms is not None else None
+
+			if row is not None:
+				results.append({
+					'domain'   : domains[domain_id].key,
+					'document' : atoms.key,
+					'atom_id'  : atom_id,
+					'text'     : atoms.texts[row],
+					'score'    : score
+				})
 
 		return results
 
+	# Search several domains at once (e.g. expertise + web search) with
+	# fused ranking; hits tagged with their domain and document key
+	# ------------------------------------------------------------------
+	def search_federated(self, domains, query, top_k, fusion='rrf', k_domain=None):
+		domains = self._get_domains(domains)
+		hits    = self.vdb.query_federated(
+			domain_ids   = list(domains),
+			query_vector = self.encoder.encode(query),
+			k            = top_k,
+			fusion       = fusion,
+			k_domain     = k_domain
+		)
 
+		return self._get_federated_results(domains, hits)
+
+	# Federated search with encoding micro-batched and vector search in
+	# worker thread: event loop stays free while ingestion writes domains
+	# ------------------------------------------------------------------
+	async def search_federated_async(self, domains, query, top_k, fusion='rrf', k_domain=None):
+		domains = self._get_domains(domains)
+		hits    = await self.vdb.query_federated_async(
+			domain_ids   = list(domains),
+			query_vector = await self.encoder.encode_async(query),
+			k            = top_k,
+			fusion       = fusion,
+			k_domain     = k_domain
+		)
+
+		return self._get_federated_results(domains, hits)
+
+	# Load what search reads from DB (persisted kernels, up to kernel cache
+	# budget) on calling thread: search itself may then run DB-free
+	# ------------------------------------------------------------------
+	def _prepare_search(self, domain_id):
+		if self.affinity == 'precomputed':
+			for atoms in self.atoms.get_documents(domain_id):
+				if self.atoms.kernels.is_full():
+					break
+				if len(atoms):
+					self._get_kernel(atoms)
+
+	# Search, encoding query in micro-batch with concurrent callers; vector
+	# prefilter and retriever run in worker thread, event loop stays free.
+	# Cancelling awaiting task (e.g. asyncio.wait_for timeout) stops worker
+	# at its next retriever tick
+	# ------------------------------------------------------------------
+	async def search_async(self, domain_id, query, top_k, max_steps, candidates=None, patience=None, deadline_ms=None, cancel=None, nprobe=None, ef_search=None):
+		deadline     = self._get_deadline(deadline_ms)
+		query_vector = await self.encoder.encode_async(query)
+
+		self._prepare_search(domain_id)
+
+		stopped = threading.Event()
+		try:
+			return await asyncio.to_thread(
+				self._search_vector,
+				domain_id, query_vector, top_k, max_steps, candidates, patience, deadline,
+				_AnyEvent(stopped, cancel) if cancel is not None else stopped,
+				nprobe, ef_search,
+				load = False
+			)
+		except asyncio.CancelledError:
+			stopped.set()
+			raise
+
+
+	# Rerank structurally selected candidates by cosine to query; exact
+	# vector index similarities (hits: {sid: similarity}, ids: atom sids by
+	# row; flat uncompressed index only) are reused, cosine computed only
+	# for candidates without hit
+	# ------------------------------------------------------------------
 	def _score(
 		self,
 		mask,
 		vectors,
 		query_vector,
 		top_k,
-		threshold = 0.85,
-		min_candidates = 8
+		threshold      = 0.85,
+		min_candidates = 8,
+		ids            = None,
+		hits           = None
 	):
-		import numpy as np
+		mask = np.asarray(mask, dtype='float32')
 
 		# Phase 1: structural filtering
-		candidates = [i for i, v in enumerate(mask) if v >= threshold]
+		candidates = np.flatnonzero(mask >= threshold)
 
 		if len(candidates) < min_candidates:
-			candidates = sorted(
-				range(len(mask)),
-				key=lambda i: mask[i],
-				reverse=True
-			)[:max(top_k * 3, min_candidates)]
+			candidates = np.argsort(-mask, kind='stable')[:max(top_k * 3, min_candidates)]
 
 		# Phase 2: semantic alignment
-		q = query_vector / (np.linalg.norm(query_vector) + 1e-9)
+		scores = np.full(len(candidates), np.nan, dtype='float32')
+
+		if hits and ids is not None:
+			scores[:] = [hits.get(int(ids[i]), np.nan) for i in candidates]
+
+		missing = np.isnan(scores)
+		if missing.any():
+			q               = query_vector / (np.linalg.norm(query_vector) + 1e-9)
+			v               = np.asarray(vectors)[candidates[missing]]
+			scores[missing] = (v @ q) / (np.linalg.norm(v, axis=1) + 1e-9)
+
+		order = np.argsort(-scores, kind='stable')[:top_k]
+		return [int(i) for i in candidates[order]]
+
+	# ==================================================================
+	# TEST METHODS
+	# ==================================================================
+
+	# Atom store against ORM path it replaced (document.atoms, blob
+	# decoding): same atom sids in same order, texts and vectors per document
+	# ------------------------------------------------------------------
+	def test_atoms(self, domain_id):
+		documents  = SemanticDomain.get(domain_id).get_documents()
+		mismatches = []
+
+		print(f'\n=== Atom store vs DB: domain {domain_id}, {len(documents)} documents ===')
+
+		for document in documents:
+			rows    = [(atom.id, atom.text, vector_deserialize(atom.vector)) for atom in document.atoms]
+			rows    = [row for row in rows if row[2] is not None]
+			vectors = torch.stack([row[2] for row in rows]).numpy() if rows else None
+			atoms   = self.atoms.get(domain_id, document.id)
+
+			same = (
+				atoms is not None and
+				atoms.ids.tolist() == [row[0] for row in rows] and
+				atoms.texts        == [row[1] for row in rows] and
+				(vectors is None and not len(atoms) or vectors is not None and np.array_equal(atoms.vectors, vectors))
+			)
+
+			if not same:
+				mismatches.append(document.key)
+				print(f'Mismatch: `{document.key}`')
+
+		print(f'Identical: {len(documents) - len(mismatches)}/{len(documents)} documents')
+
+		if mismatches:
+			raise AssertionError(f'Atom store differs from DB for {len(mismatches)} documents')
+
+		return len(documents) - len(mismatches)
+
+	# Parity of precomputed affinity with yo.kernels.Affinity: search lines
+	# of every domain document per query under both kernels
+	# ------------------------------------------------------------------
+	def test_affinity(self, domain_id, queries, top_k=5, max_steps=16):
+		total      = 0
+		mismatches = 0
+
+		print(f'\n=== Affinity parity: yo vs precomputed (dense_max={self.dense_max}, neighbours={self.neighbours}) ===')
+
+		for query, query_vector in zip(queries, yo.to_numpy(self.encoder.encode_batch(queries))):
+			for atoms in self.atoms.get_documents(domain_id):
+				if not len(atoms):
+					continue
+
+				lines = [
+					self.search_document(
+						document     = atoms,
+						query_vector = query_vector,
+						max_steps    = max_steps,
+						top_k        = top_k,
+						matrix       = (atoms.texts, atoms.vectors, kernel, atoms.ids)
+					)
+					for kernel in (yo.kernels.Affinity(atoms.vectors), self._build_kernel(atoms.vectors))
+				]
+
+				total += 1
+				if lines[0] != lines[1]:
+					mismatches += 1
+					print(f'Mismatch: `{query}` in `{atoms.key}`: {lines[0]} vs {lines[1]}')
+
+		print(f'Identical: {total - mismatches}/{total} document searches')
 
-		scored = []
-		for i in candidates:
-			v = vectors[i]
-			v = v / (np.linalg.norm(v) + 1e-9)
-			score = float((q * v).sum())
-			scored.append((i, score))
+		if mismatches:
+			raise AssertionError(f'Precomputed affinity changes {mismatches}/{total} document searches')
 
-		scored.sort(key=lambda x: x[1], reverse=True)
-		return [i for i, _ in scored[:top_k]]
+		return total - mismatches